@@ -1,12 +1,10 @@
-
 from application import create_app
-from application.models import db
-
-app = create_app('DevelopmentConfig')   
+from application.utils.lifecycle import warm_up
 
-with app.app_context():
-    db.create_all()
-    # db.drop_all()
+app = create_app('DevelopmentConfig')   ## development server only, production runs wsgi:app under gunicorn (gunicorn.conf.py)
+## tables are created with `flask --app app create-db`, not on every start
 
 
-app.run()
\ No newline at end of file
+if __name__ == '__main__':
+    warm_up(app)
+    app.run()
@@ -1,11 +1,12 @@
 from flask import Flask
-from application.extensions import ma,limiter,cache
+from application.extensions import ma,limiter,cache,metrics,query_detector,compress,lifecycle
 from application.models import db
 from application.blueprints.customers import customers_bp
 from application.blueprints.mechanics import mechanics_bp
 from application.blueprints.service_tickets import serviceTickets_bp
 from application.blueprints.inventories import inventories_bp
 from flask_swagger_ui import get_swaggerui_blueprint
+from application.utils.json_provider import init_json_provider
 
 SWAGGER_URI = '/api/docs'  # URL for exposing Swagger UI (without trailing '/')
 API_URL = '/static/swagger.yaml'   # Our API URL (can of course be a local resource)
@@ -21,6 +22,7 @@ swaggerui_blueprint = get_swaggerui_blueprint(
 def create_app(config_name):
     app = Flask(__name__)
     app.config.from_object(f'config.{config_name}')
+    init_json_provider(app)  ## orjson backed app.json, used by jsonify and schema.jsonify
 
 
     # Initialize extensions
@@ -28,6 +30,10 @@ def create_app(config_name):
     db.init_app(app)  #adding our db extension to our app
     limiter.init_app(app)
     cache.init_app(app)  ## initializing cache on to our app
+    metrics.init_app(app)  ## request instrumentation, after db so the engine events can be attached
+    compress.init_app(app)  ## after metrics: after_request hooks run in reverse, so metrics records the compressed size
+    query_detector.init_app(app)  ## no-op unless QUERY_DETECTOR_ENABLED
+    lifecycle.init_app(app)  ## /ready and the create-db cli command, schema creation never runs at startup
 
 
     # Register Blueprints
@@ -1,11 +1,16 @@
-from flask import request,jsonify
+import json
+from flask import request,jsonify,current_app,g
 from marshmallow import ValidationError
-from .schemas import customer_schema,customers_schema,login_schema
-from sqlalchemy import select,delete
+from .schemas import customer_schema,customers_schema,customers_rows,login_schema
+from sqlalchemy import select,delete,insert,update
+from sqlalchemy.exc import IntegrityError
 from application.models import Customer,db
 from . import customers_bp
-from application.extensions import limiter,cache
-from application.utils.util import encode_token,token_required
+from application.extensions import limiter
+from application.utils.cache_tags import cached_view,etag_view,invalidate
+from application.utils.querycheck import batched_queries
+from application.utils.passwords import get_password_hasher,PasswordPoolBusy
+from application.utils.util import encode_token,token_required,encode_cursor,decode_cursor,get_page_size,revoke_customer_tokens,revoke_token
 
 ###================= Flask API with CRUD Endpoints ============================= ###
 
@@ -21,10 +26,20 @@ def login():
         return jsonify({"error": e.messages,
                         'messages': 'Invalid payload, expecting username and password'}),400
     
-    query = select(Customer).where(Customer.email == email)
-    customer= db.session.execute(query).scalars().first() #Query customer table for a customer with this email
+    ## Only the columns the login needs, the hash check runs in the bounded password pool
+    query = select(Customer.id, Customer.name, Customer.password).where(Customer.email == email)
+    customer= db.session.execute(query).first() #Query customer table for a customer with this email
 
-    if customer and customer.password == password: #if we have a customer associated with the customername, validate the password
+    try:
+        hasher = get_password_hasher()
+        matches, new_hash = hasher.verify(customer.password, password) if customer else hasher.verify_unknown(password)
+    except PasswordPoolBusy:
+        return jsonify({'messages': "Too many logins in progress, try again shortly."}), 503, {"Retry-After": "1"}
+
+    if matches: #if we have a customer associated with the customername, validate the password
+        if new_hash: # plaintext or outdated hash cost, upgrade it now that we know the password
+            db.session.execute(update(Customer).where(Customer.id == customer.id).values(password=new_hash))
+            db.session.commit()
         auth_token = encode_token(customer.id)
 
         response = {
@@ -54,15 +69,130 @@ def create_customer():
 
     if existing_customer:
         return jsonify({"error" : "Email already associated with an account."}),400
+    try:
+        customer_data['password'] = get_password_hasher().hash(customer_data['password'])
+    except PasswordPoolBusy:
+        return jsonify({"error": "Too many requests in progress, try again shortly."}), 503, {"Retry-After": "1"}
       #use data to create an instance of Customer
     new_customer = Customer(**customer_data)
     #save new_user to the database
     db.session.add(new_customer)  
     db.session.commit()
+    invalidate("customers")
     # Use schema to return the serialized data of the created Customer
     return jsonify({"Message": "New Customer details added successfully",
                     "customer": customer_schema.dump(new_customer)}), 201
 
+#=================  Create Customers in bulk (POST)   ====================#
+
+## Accepts a JSON array of customers or an NDJSON body (one customer per line, Content-Type: application/x-ndjson).
+## Rows are validated with customers_schema, duplicate emails are checked with one IN query and the valid rows are
+## inserted with executemany in CUSTOMERS_BULK_BATCH_SIZE batches. Invalid rows are reported and skipped, including rows
+## the database rejects as duplicates (a batch that fails is retried row by row).
+def parse_bulk_rows():
+    if request.mimetype == 'application/x-ndjson':
+        rows, errors = [], {}
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                errors[len(rows)] = {"_schema": ["Invalid JSON."]}
+                rows.append(None)
+        return rows, errors
+
+    rows = request.get_json(silent=True)
+    if not isinstance(rows, list):
+        raise ValueError("Expecting a JSON array of customers or an NDJSON body.")
+    return rows, {}
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def taken_emails(emails): # normalized emails of existing customers; IN on the indexed column, MySQL compares case-insensitively
+    if not emails:
+        return set()
+    query = select(Customer.email).where(Customer.email.in_(emails | {normalize_email(email) for email in emails}))
+    return {normalize_email(email) for email in db.session.execute(query).scalars().all()}
+
+
+@customers_bp.route('/bulk', methods=['POST'])
+@batched_queries  # one INSERT per batch (and per row when a batch is retried)
+@limiter.limit("10 per minute")
+def create_customers_bulk():
+
+    try:
+        rows, errors = parse_bulk_rows()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    max_rows = current_app.config.get("CUSTOMERS_BULK_MAX_ROWS", 200)
+    if not rows:
+        return jsonify({"error": "No customers to create."}), 400
+    if len(rows) > max_rows:
+        return jsonify({"error": f"A bulk request can create at most {max_rows} customers."}), 400
+
+    try:	# Deserialize and validate every row, rows with errors are skipped
+        valid_data = customers_schema.load([row for row in rows if row is not None])
+        load_errors = {}
+    except ValidationError as e:
+        valid_data = e.valid_data
+        load_errors = e.messages
+
+    parsed_rows = [index for index, row in enumerate(rows) if row is not None]
+    customers = {}
+    for position, index in enumerate(parsed_rows):
+        if position in load_errors:
+            errors[index] = load_errors[position]
+        else:
+            customers[index] = valid_data[position]
+
+    # Duplicate emails: against the database in one query, and inside the request itself. Emails are compared
+    # case-insensitively like MySQL's default collation, so A@x.com and a@x.com in one request are a duplicate.
+    taken = taken_emails({customer['email'] for customer in customers.values()})
+
+    for index, customer in sorted(customers.items()):
+        if normalize_email(customer['email']) in taken:
+            errors[index] = {"email": ["Email already associated with an account."]}
+            del customers[index]
+        else:
+            taken.add(normalize_email(customer['email']))
+
+    batch_size = current_app.config.get("CUSTOMERS_BULK_BATCH_SIZE", 100)
+    new_customers = sorted(customers.items())
+    try:
+        hashes = get_password_hasher().hash_many([customer['password'] for _, customer in new_customers])
+    except PasswordPoolBusy:
+        return jsonify({"error": "Too many requests in progress, try again shortly."}), 503, {"Retry-After": "1"}
+    for (_, customer), password_hash in zip(new_customers, hashes):
+        customer['password'] = password_hash
+
+    created = 0
+    for start in range(0, len(new_customers), batch_size):
+        batch = new_customers[start:start + batch_size]
+        try:
+            with db.session.begin_nested():  # savepoint, a failed batch does not undo the earlier ones
+                db.session.execute(insert(Customer), [customer for _, customer in batch])  # executemany per batch
+            created += len(batch)
+        except IntegrityError:  # an email created concurrently, or equal under the database collation: find the rows
+            for index, customer in batch:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(insert(Customer), [customer])
+                    created += 1
+                except IntegrityError:
+                    errors[index] = {"email": ["Email already associated with an account."]}
+    db.session.commit()
+    invalidate("customers")
+
+    return jsonify({"Message": f"{created} new customers added successfully",
+                    "created": created,
+                    "failed": len(errors),
+                    "errors": [{"row": index, "errors": errors[index]} for index in sorted(errors)]}), 201 if created else 400
+
 #========== Retrieve Customers (GET) ===========================#
 '''
 @customers_bp.route("/", methods=['GET'])
@@ -77,36 +207,46 @@ def get_customers():
 
     return customers_schema.jsonify(customer)
 '''
-#========== Retrieve Customers using pagination (GET) ===========================#
+#========== Retrieve Customers using keyset (cursor) pagination (GET) ===========================#
 
+## Pages are keyed on Customer.id (WHERE id > last seen id ORDER BY id LIMIT n), so deep pages cost the same as the first one
+## and no COUNT query is run. The opaque cursor for the next page is returned in the X-Next-Cursor response header.
 @customers_bp.route("/", methods=['GET'])
+@etag_view("customers")
 # @limiter.limit("3 per hour") # A client can only attempt to make(limit this request to 3 times per hour) 3 users per hour other way to call ("3/hour")
-@cache.cached(timeout=30, query_string=True) ## To impove the get customers API performances configure cacheing mechanisham implemted simple cacheing
+@cached_view("customers") ## every page (cursor, per_page) is cached under its own key, customer writes invalidate them all
 def get_customers():
-    
+
     try:
-        page = int(request.args.get("page"))  ## converting to interger
-        per_page = int(request.args.get("per_page"))
-        query = select(Customer)
-        customers = db.paginate(query, page = page, per_page = per_page)  ## pagination used to page and per_page numbers based on retrieve the customers
-        
-        return customers_schema.jsonify(customers),200
+        per_page = get_page_size()  ## always capped by PAGINATION_MAX_PER_PAGE
+        last_id = decode_cursor(request.args.get("cursor"))
+        serializer = customers_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    except:
-        query = select(Customer)
-        print("db is executed")
-        customers = db.session.execute(query).scalars().all()
+    query = serializer.select().where(Customer.id > last_id).order_by(Customer.id).limit(per_page + 1) ## one extra row tells us if there is a next page
+    customers = serializer.all(query)
 
-        return customers_schema.jsonify(customers),200
+    response = jsonify(customers[:per_page])
+    if len(customers) > per_page:
+        response.headers['X-Next-Cursor'] = encode_cursor(customers[per_page - 1]["id"])
+
+    return response, 200
 
 #=========== Retrieve Specific Customer (GET) ================== #
 
 @customers_bp.route("/<int:customer_id>", methods=['GET'])
+@etag_view("customers")
 def get_customer(customer_id):
 
-    customer = db.session.get(Customer, customer_id)
+    try:
+        serializer = customers_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    customer = serializer.first(serializer.select().where(Customer.id == customer_id))
     if customer:
-        return customer_schema.jsonify(customer), 200
+        return jsonify(customer), 200
     
     return jsonify({"error": "Customer not found."}), 404
 
@@ -127,10 +267,16 @@ def update_customer(customer_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
+    try:
+        customer_data['password'] = get_password_hasher().hash(customer_data['password'])
+    except PasswordPoolBusy:
+        return jsonify({"error": "Too many requests in progress, try again shortly."}), 503, {"Retry-After": "1"}
+
     for key, value in customer_data.items():
         setattr(customer, key, value)
 
     db.session.commit()
+    invalidate("customers", "service_tickets")
 
     return jsonify({"Message": f'Successfully Updated Customer id: {customer_id}',
                     "customer": customer_schema.dump(customer)}), 200
@@ -150,7 +296,19 @@ def delete_customer(customer_id):
     
     db.session.delete(customer)
     db.session.commit()
+    invalidate("customers", "service_tickets")
+    revoke_customer_tokens(customer_id) ## tokens are no longer checked against the db, so outstanding ones are revoked here
     
     return jsonify({"Message": f'customer id: {customer_id}, successfully deleted.'}), 200
 
+#========== Logout, revoke the current token (POST)=================#
+
+@customers_bp.route("/logout", methods=['POST'])
+@token_required
+def logout(customer_id):
+
+    revoke_token(g.token_claims) ## only this token, other sessions of the customer stay logged in
+
+    return jsonify({"Message": f'customer id: {customer_id}, successfully logged out.'}), 200
+
 
@@ -1,14 +1,17 @@
 
 from application.extensions import ma
 from application.models import Customer
+from application.utils.row_serializers import RowSerializer
 
 
 #====Schema =====#
 class CustomerSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model= Customer 
+        load_only = ("password",)  ## stored as a hash, never returned
        
 
 customer_schema = CustomerSchema() 
 customers_schema = CustomerSchema(many=True)
+customers_rows = RowSerializer(customers_schema)  ## GET /customers/ list, same output from Core rows
 login_schema = CustomerSchema(exclude =['name','address','phone','salary'] ) 
\ No newline at end of file
@@ -1,10 +1,14 @@
-from flask import request,jsonify
+import csv
+import io
+from flask import request,jsonify,current_app
 from marshmallow import ValidationError
-from .schemas import inventory_schema, inventories_schema
+from .schemas import inventory_schema, inventories_rows, inventories_import_schema
 from sqlalchemy import select
 from application.models import Inventory,db
 from . import inventories_bp
-from application.extensions import cache
+from application.utils.util import upsert_statement
+from application.utils.cache_tags import cached_view,etag_view,invalidate
+from application.utils.querycheck import batched_queries
 
 ###================= Flask API with CRUD Endpoints ============================= ###
 
@@ -22,29 +26,117 @@ def create_inventory():
  
     db.session.add(new_inventory)  
     db.session.commit()
+    invalidate("inventories")
     
     return jsonify({"Message": f"The {new_inventory.name} New Inventory details added successfully",
                     "Inventory": inventory_schema.dump(new_inventory)}), 201
 
+#=================  Import Inventory catalog from CSV (POST)   ====================#
+
+## Upload a supplier catalog as multipart `file` or as a raw text/csv body, with at least the columns sku,name,price.
+## The CSV is parsed row by row from the request stream and upserted on sku in INVENTORY_IMPORT_CHUNK_SIZE chunks,
+## so memory stays bounded by the chunk size. Each chunk is one SELECT (to count updates) + one upsert + one commit.
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+def import_inventory_chunk(chunk, summary):
+    try:
+        valid_data = inventories_import_schema.load([row for _, row in chunk])
+        load_errors = {}
+    except ValidationError as e:
+        valid_data = e.valid_data
+        load_errors = e.messages
+
+    rows = {}
+    for position, (line, _) in enumerate(chunk):
+        if position in load_errors:
+            summary["rejected"] += 1
+            if len(summary["errors"]) < MAX_REPORTED_IMPORT_ERRORS:
+                summary["errors"].append({"line": line, "errors": load_errors[position]})
+        else:
+            row = valid_data[position]
+            if row["sku"] in rows: # same sku twice in the chunk, the last row wins
+                summary["updated"] += 1
+            rows[row["sku"]] = row
+
+    if not rows:
+        return
+
+    query = select(Inventory.sku).where(Inventory.sku.in_(rows))
+    existing = set(db.session.execute(query).scalars().all())
+    summary["updated"] += len(existing)
+    summary["inserted"] += len(rows) - len(existing)
+
+    statement = upsert_statement(Inventory.__table__, ["sku"],
+                                 lambda incoming: {"name": incoming.name, "price": incoming.price})
+    db.session.execute(statement, list(rows.values()))
+    db.session.commit()
+    invalidate("inventories", "service_tickets")  # export rows embed part names and prices
+
+
+@inventories_bp.route('/import', methods=['POST'])
+@batched_queries  # one SELECT and one upsert per chunk
+def import_inventories():
+
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+    elif request.mimetype == 'text/csv':
+        stream = request.stream
+    else:
+        return jsonify({"error": "Upload a CSV file as 'file' or send a text/csv body."}), 400
+
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    chunk_size = current_app.config.get("INVENTORY_IMPORT_CHUNK_SIZE", 1000)
+    summary = {"inserted": 0, "updated": 0, "rejected": 0, "errors": []}
+    chunk = []
+
+    try:	# the file is decoded and parsed while it is read, chunks before a bad line are already imported
+        if not reader.fieldnames or not {"sku", "name", "price"} <= set(reader.fieldnames):
+            return jsonify({"error": "CSV header must include sku, name and price."}), 400
+
+        for row in reader:
+            chunk.append((reader.line_num, row))
+            if len(chunk) == chunk_size:
+                import_inventory_chunk(chunk, summary)
+                chunk = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        problem = "File is not valid UTF-8." if isinstance(e, UnicodeDecodeError) else f"Malformed CSV: {e}."
+        return jsonify({"error": f"{problem} Import stopped after line {reader.line_num}.", **summary}), 400
+    if chunk:
+        import_inventory_chunk(chunk, summary)
+
+    return jsonify({"Message": "Inventory catalog imported successfully", **summary}), 200
+
 #========== Retrieve all Inventories (GET) ===========================#
 
 @inventories_bp.route("/", methods=['GET'])
-@cache.cached(timeout=30) # Database data is refreshed in the cache based on a set timeout interval.
+@etag_view("inventories")
+@cached_view("inventories") # Cached until an inventory write invalidates the "inventories" tag (or CACHE_DEFAULT_TIMEOUT).
 def get_inventories():
 
-    query = select(Inventory)
-    inventory = db.session.execute(query).scalars().all()
+    try:
+        serializer = inventories_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    inventory = serializer.all(serializer.select())
 
-    return inventories_schema.jsonify(inventory)
+    return jsonify(inventory)
 
 #=========== Retrieve Specific Inventory (GET) ================== #
 
 @inventories_bp.route("/<int:inventory_id>", methods=['GET'])
+@etag_view("inventories")
 def get_inventory(inventory_id):
 
-    inventory = db.session.get(Inventory, inventory_id)
+    try:
+        serializer = inventories_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    inventory = serializer.first(serializer.select().where(Inventory.id == inventory_id))
     if inventory:
-        return inventory_schema.jsonify(inventory), 200
+        return jsonify(inventory), 200
     
     return jsonify({"error": "Inventory id is not found."}), 404
 
@@ -68,6 +160,7 @@ def update_inventory(inventory_id):
         setattr(inventory, key, value)
 
     db.session.commit()
+    invalidate("inventories", "service_tickets")
 
     return jsonify({"Message": f'Successfully Updated Inventory id: {inventory_id}',
                     "Inventory": inventory_schema.dump(inventory)}), 200
@@ -84,5 +177,6 @@ def delete_inventory(inventory_id):
     
     db.session.delete(inventory)
     db.session.commit()
+    invalidate("inventories", "service_tickets")
     
     return jsonify({"message": f'Inventory id: {inventory_id}, successfully deleted.'}), 200
\ No newline at end of file
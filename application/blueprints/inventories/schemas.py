@@ -1,5 +1,7 @@
 from application.extensions import ma
 from application.models import Inventory
+from application.utils.row_serializers import RowSerializer
+from marshmallow import EXCLUDE, fields, validate
 
 
 #====Schema =====#
@@ -8,5 +10,17 @@ class InventorySchema(ma.SQLAlchemyAutoSchema):
         model= Inventory
 
 
+# # === input schema for CSV catalog imports, sku is the upsert key so it is required ===
+
+class InventoryImportSchema(InventorySchema):
+    sku = fields.String(required=True, validate=validate.Length(min=1, max=100))  # column is String(100)
+
+    class Meta(InventorySchema.Meta):
+        exclude = ("id",)
+        unknown = EXCLUDE  # ignore extra supplier columns
+
+
 inventory_schema = InventorySchema()
 inventories_schema = InventorySchema(many=True)
+inventories_rows = RowSerializer(inventories_schema)  ## GET /inventories/ list, same output from Core rows
+inventories_import_schema = InventoryImportSchema(many=True)
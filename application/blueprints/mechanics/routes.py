@@ -1,10 +1,11 @@
-from flask import request,jsonify
+from flask import request,jsonify,current_app
 from marshmallow import ValidationError
-from .schemas import mechanic_schema,mechanics_schema
-from sqlalchemy import select
-from application.models import Mechanics,db
+from .schemas import mechanic_schema,mechanics_schema,mechanics_rows
+from sqlalchemy import select,func
+from application.models import Mechanics,db,mechanic_services
 from . import mechanics_bp
-from application.extensions import cache
+from application.utils.cache_tags import cached_view,etag_view,invalidate
+from application.utils.search import get_mechanic_index,index_mechanic,unindex_mechanic
 
 ###================= Flask API with CRUD Endpoints ============================= ###
 
@@ -28,6 +29,7 @@ def create_mechanic():
  
     db.session.add(new_mechanic)  
     db.session.commit()
+    index_mechanic(new_mechanic, invalidate("mechanics"))  # keep the name search index in sync
     
     return jsonify({"Message": "New Mechanic details added successfully",
                     "Mechanic": mechanic_schema.dump(new_mechanic)}), 201
@@ -35,22 +37,33 @@ def create_mechanic():
 #========== Retrieve Mechanics (GET) ===========================#
 
 @mechanics_bp.route("/", methods=['GET'])
-@cache.cached(timeout=30)
+@etag_view("mechanics")
+@cached_view("mechanics") ## invalidated by mechanic writes
 def get_mechanics():
 
-    query = select(Mechanics)
-    mechanic = db.session.execute(query).scalars().all()
+    try:
+        serializer = mechanics_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    mechanic = serializer.all(serializer.select())
 
-    return mechanics_schema.jsonify(mechanic)
+    return jsonify(mechanic)
 
 #=========== Retrieve Specific Mechanic (GET) ================== #
 
 @mechanics_bp.route("/<int:mechanic_id>", methods=['GET'])
+@etag_view("mechanics")
 def get_mechanic(mechanic_id):
 
-    mechanic = db.session.get(Mechanics, mechanic_id)
+    try:
+        serializer = mechanics_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    mechanic = serializer.first(serializer.select().where(Mechanics.id == mechanic_id))
     if mechanic:
-        return mechanic_schema.jsonify(mechanic), 200
+        return jsonify(mechanic), 200
     
     return jsonify({"error": "Mechanic id is not found."}), 404
 
@@ -74,6 +87,7 @@ def update_mechanic(mechanic_id):
         setattr(mechanic, key, value)
 
     db.session.commit()
+    index_mechanic(mechanic, invalidate("mechanics", "service_tickets"))
 
     return jsonify({"Message": f'Successfully Updated Mechanic id: {mechanic_id}',
                     "mechanic": mechanic_schema.dump(mechanic)}), 200
@@ -90,36 +104,75 @@ def delete_mechanic(mechanic_id):
     
     db.session.delete(mechanic)
     db.session.commit()
+    unindex_mechanic(mechanic_id, invalidate("mechanics", "service_tickets"))
     
     return jsonify({"message": f'mechanic id: {mechanic_id}, successfully deleted.'}), 200
 
 #================== Retrieve a list of popular mechanics (GET)  ===============#
 
-# A display a list of mechanics in order of who has worked on the most tickets using sort() and lambda function
+# A display a list of mechanics in order of who has worked on the most tickets.
+# The ticket counts are computed in the db with GROUP BY/COUNT over mechanic_services and only the requested page is returned,
+# so this is a single query and no service ticket objects are loaded.
 
 @mechanics_bp.route("/popular-mechanic", methods=['GET'])
+@etag_view("mechanics", "service_tickets")
 def popular_mechanics():
-    query = select(Mechanics)
-    mechanics = db.session.execute(query).scalars().all()
-
-    mechanics.sort(key = lambda mechanic :len(mechanic.services),reverse=True)
 
-    # for mechanic in mechanics:
-    #     print(mechanic.name , len(mechanic.services))
+    try:
+        limit = int(request.args.get("limit", 10))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers."}), 400
+
+    if limit <= 0 or offset < 0:
+        return jsonify({"error": "limit must be positive and offset can not be negative."}), 400
+    limit = min(limit, current_app.config.get("PAGINATION_MAX_PER_PAGE", 100))
+
+    ticket_counts = (select(mechanic_services.c.mechanic_id, func.count().label("ticket_count"))
+                     .group_by(mechanic_services.c.mechanic_id)
+                     .subquery())
+    ticket_count = func.coalesce(ticket_counts.c.ticket_count, 0).label("ticket_count")  # mechanics without tickets count as 0
+
+    query = (select(Mechanics, ticket_count)
+             .outerjoin(ticket_counts, ticket_counts.c.mechanic_id == Mechanics.id)
+             .order_by(ticket_count.desc(), Mechanics.id)
+             .limit(limit)
+             .offset(offset))
+    rows = db.session.execute(query).all()
+
+    mechanics = []
+    for mechanic, count in rows:
+        mechanic_data = mechanic_schema.dump(mechanic)
+        mechanic_data["ticket_count"] = count
+        mechanics.append(mechanic_data)
 
     return jsonify({"Message" : "Successfully Retrieve a list mechanics in order of who has worked on the most tikets",
-                                     "Most popular Mechanics List Order by:" : mechanics_schema.dump(mechanics)}),200
+                                     "Most popular Mechanics List Order by:" : mechanics}),200
 
 #================== Retrieve a list of mechanic name(use search passing parameter with  name) (GET)  ===============#
 
+## Uses the in-process trigram index (application/utils/search.py) instead of LIKE '%name%', which scanned the whole table.
+## Results are ranked: exact name, word prefix, substring, then fuzzy matches (typos), and capped by ?limit=.
 
 @mechanics_bp.route("/search", methods=['GET'])
 def serch_mechanics():
     
-    name = request.args.get("name")
-    print(name)
-    # query = select(Mechanics).where(Mechanics.name.like(name))
-    query = select(Mechanics).where(Mechanics.name.like(f'%{name}%')) # retrieve list of name based on passing parameter name
-    mechanics=db.session.execute(query).scalars().all()
+    name = request.args.get("name", "").strip()
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer."}), 400
+
+    if not name or limit <= 0:
+        return mechanics_schema.jsonify([])
+    limit = min(limit, current_app.config.get("PAGINATION_MAX_PER_PAGE", 100))
+
+    mechanic_ids = get_mechanic_index().search(name, limit=limit)
+    if not mechanic_ids:
+        return mechanics_schema.jsonify([])
+
+    query = select(Mechanics).where(Mechanics.id.in_(mechanic_ids))
+    mechanics_by_id = {mechanic.id: mechanic for mechanic in db.session.execute(query).scalars().all()}
+    mechanics = [mechanics_by_id[mechanic_id] for mechanic_id in mechanic_ids if mechanic_id in mechanics_by_id] # keep the ranking order
 
     return mechanics_schema.jsonify(mechanics)
@@ -1,5 +1,6 @@
 from application.extensions import ma
 from application.models import Mechanics
+from application.utils.row_serializers import RowSerializer
 
 
 #====Schema =====#
@@ -10,3 +11,4 @@ class MechanicSchema(ma.SQLAlchemyAutoSchema):
 
 mechanic_schema = MechanicSchema()
 mechanics_schema = MechanicSchema(many=True)
+mechanics_rows = RowSerializer(mechanics_schema)  ## GET /mechanics/ list, same output from Core rows
@@ -1,11 +1,16 @@
-from flask import request,jsonify
+import csv
+import io
+from flask import request,jsonify,Response,current_app,stream_with_context
 from marshmallow import ValidationError
-from .schemas import service_ticket_schema,service_tickets_schema,return_service_schema,edit_service_schema,service_ticket_create_schema
-from sqlalchemy import select
-from application.models import Customer,Service_tickets,Mechanics,db,ServiceInventory,Inventory
+from .schemas import service_ticket_schema,service_tickets_rows,return_service_schema,edit_service_schema,service_ticket_create_schema,service_tickets_export_schema,add_parts_schema
+from sqlalchemy import select,insert,delete
+from sqlalchemy.orm import selectinload
+from application.models import Customer,Service_tickets,Mechanics,db,ServiceInventory,Inventory,mechanic_services
 from . import serviceTickets_bp
 from application.extensions import limiter
-from application.utils.util import token_required
+from application.utils.util import token_required,encode_cursor,decode_cursor,get_page_size,upsert_statement
+from application.utils.search import unindex_mechanic
+from application.utils.cache_tags import etag_view,invalidate
 
 ###================= Flask API with CRUD Endpoints ============================= ###
 
@@ -20,33 +25,38 @@ def create_service_ticket_mechanics():
         return jsonify(e.messages),400
     
     #pull mechanic_ids out so you don't pass them into the model ctor
-    mechanic_ids = service_data.pop('mechanic_ids', [])
+    mechanic_ids = list(dict.fromkeys(service_data.pop('mechanic_ids', [])))  # drop duplicate ids, keep the order
 
     # Retrieve the customer by its id.
     customer = db.session.get(Customer, service_data['customer_id'])
    
     # Check if the customer exists
-    if customer:
-        # Always add the service to the session BEFORE appending relationships
-        new_service= Service_tickets(**service_data)
-        db.session.add(new_service)  # add to session before appending mechanics
+    if not customer:
+        return jsonify({"error" : "Customer id not in an account."}),400
 
-        for mechanic_id in mechanic_ids:
-            query = select(Mechanics).where(Mechanics.id == mechanic_id)
-            mechanic=db.session.execute(query).scalar()
+    # Resolve every mechanic id with one IN query and reject the whole request if any of them is missing,
+    # before anything is added to the session.
+    query = select(Mechanics.id).where(Mechanics.id.in_(mechanic_ids))
+    found_ids = set(db.session.execute(query).scalars().all()) if mechanic_ids else set()
+    invalid_ids = [mechanic_id for mechanic_id in mechanic_ids if mechanic_id not in found_ids]
 
-            if mechanic:
-                new_service.mechanics.append(mechanic)
-            else:
-                return jsonify({"message": f"Invalid mechanic id: {mechanic_id}"})
+    if invalid_ids:
+        return jsonify({"message": f"Invalid mechanic id: {', '.join(str(mechanic_id) for mechanic_id in invalid_ids)}",
+                        "invalid_mechanic_ids": invalid_ids}), 400
 
-        db.session.commit()
-    
-        return jsonify({"Message": "New service ticket details added successfully",
+    new_service= Service_tickets(**service_data)
+    db.session.add(new_service)
+    db.session.flush()  # assigns new_service.id for the association rows
+
+    if mechanic_ids: # one executemany INSERT into mechanic_services instead of appending mechanic objects one by one
+        db.session.execute(insert(mechanic_services),
+                           [{"mechanic_id": mechanic_id, "service_id": new_service.id} for mechanic_id in mechanic_ids])
+    db.session.commit()
+    invalidate("service_tickets")
+
+    return jsonify({"Message": "New service ticket details added successfully",
                     "Service": return_service_schema.dump(new_service)}), 201
                           # return full nested result
-    else:  
-        return jsonify({"error" : "Customer id not in an account."}),400
     
 #=================  Create Service Ticket without mechanics (POST)   ====================#
 ## API not using anymore Created for learning purpose:
@@ -68,6 +78,7 @@ def create_service_ticket():
  
         db.session.add(new_service)  
         db.session.commit()
+        invalidate("service_tickets")
     
         return jsonify({"Message": "New service ticket details added successfully",
                     "Service": service_ticket_schema.dump(new_service)}), 201
@@ -76,13 +87,40 @@ def create_service_ticket():
 
 #========== Retrieves all service tickets (GET) ===========================#
 
+## Tickets are read as plain rows with only the ?fields= columns. Nested objects are opt-in with ?expand=customer,mechanics
+## and read in bulk: customer is many-to-one -> LEFT OUTER JOIN (same SELECT), mechanics is a collection -> one extra
+## SELECT ... IN for the page. The number of queries stays the same no matter how many tickets are returned.
+def service_tickets_page_query(serializer, last_id, per_page):
+    return (serializer.select()
+            .where(Service_tickets.id > last_id)
+            .order_by(Service_tickets.id)
+            .limit(per_page + 1))  ## one extra row tells us if there is a next page
+
+
+def service_tickets_page_response(serializer, query, per_page):
+    service = serializer.all(query)
+
+    response = jsonify(service[:per_page])
+    if len(service) > per_page:
+        response.headers['X-Next-Cursor'] = encode_cursor(service[per_page - 1]["id"])
+
+    return response, 200
+
+
 @serviceTickets_bp.route("/", methods=['GET'])
+@etag_view("service_tickets")
 def get_service_tickets():
 
-    query = select(Service_tickets)
-    service = db.session.execute(query).scalars().all()
+    try:
+        per_page = get_page_size()
+        last_id = decode_cursor(request.args.get("cursor"))
+        serializer = service_tickets_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = service_tickets_page_query(serializer, last_id, per_page)
 
-    return service_tickets_schema.jsonify(service), 200
+    return service_tickets_page_response(serializer, query, per_page)
 
 
 #========== Retrieves all service tickets from single customer (GET) ===========================#
@@ -91,21 +129,95 @@ def get_service_tickets():
 
 @serviceTickets_bp.route("/my-tickets", methods=['GET'])
 @token_required
+@etag_view("service_tickets")
 def get_customer_service_tickets(customer_id):
 
-    query = select(Service_tickets).filter_by(customer_id = customer_id)
-    service = db.session.execute(query).scalars().all()
+    try:
+        per_page = get_page_size()
+        last_id = decode_cursor(request.args.get("cursor"))
+        serializer = service_tickets_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = service_tickets_page_query(serializer, last_id, per_page).where(Service_tickets.customer_id == customer_id)
+
+    return service_tickets_page_response(serializer, query, per_page)
+
+#========== Export all service tickets with mechanics and parts as NDJSON or CSV (GET) ===========================#
+
+## Rows are read in keyset batches (WHERE id > last id ORDER BY id LIMIT EXPORT_CHUNK_SIZE) and written to the client as
+## soon as each batch is serialized, so memory stays flat and the first byte goes out after the first batch. Batches
+## rather than yield_per: mysql-connector has no server side cursors and would buffer the whole result first.
+EXPORT_CSV_COLUMNS = ["id", "VIN", "service_date", "customer_issue", "customer_id", "mechanic_ids", "parts"]
+
+def export_ndjson_chunk(rows):
+    return "".join(current_app.json.dumps(row) + "\n" for row in rows)
+
+
+def export_csv_chunk(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_COLUMNS)
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow(dict(row,
+                             mechanic_ids=";".join(str(mechanic_id) for mechanic_id in row["mechanic_ids"]),
+                             parts=";".join(f"{part['inventory_id']}:{part['quantity']}" for part in row["parts"])))
+    return buffer.getvalue()
+
+
+@serviceTickets_bp.route("/export", methods=['GET'])
+@etag_view("service_tickets")
+def export_service_tickets():
+
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be one of: ndjson, csv."}), 400
+
+    chunk_size = current_app.config.get("EXPORT_CHUNK_SIZE", 500)
+    query = (select(Service_tickets)
+             .options(selectinload(Service_tickets.mechanics),
+                      selectinload(Service_tickets.service_inventories).joinedload(ServiceInventory.inventory))
+             .order_by(Service_tickets.id)
+             .limit(chunk_size))  ## relationships loaded once per batch
+
+    def generate():
+        if export_format == "csv":
+            yield export_csv_chunk([], header=True)
+        last_id = 0
+        while True:
+            batch = db.session.execute(query.where(Service_tickets.id > last_id)).scalars().all()
+            if not batch:
+                break
+            rows = service_tickets_export_schema.dump(batch)
+            if export_format == "csv":
+                yield export_csv_chunk(rows)
+            else:
+                yield export_ndjson_chunk(rows)
+            if len(batch) < chunk_size:
+                break
+            last_id = batch[-1].id
+
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=service_tickets.{export_format}'
 
-    return service_tickets_schema.jsonify(service), 200
+    return response, 200
 
 ##=========== Retrieve Specific Service tickets (GET) ================== #
 
 @serviceTickets_bp.route("/<int:service_id>", methods=['GET'])
+@etag_view("service_tickets")
 def get_service_ticket(service_id):
 
-    service = db.session.get(Service_tickets, service_id)
+    try:
+        serializer = service_tickets_rows.from_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    service = serializer.first(serializer.select().where(Service_tickets.id == service_id))
     if service:
-        return service_ticket_schema.jsonify(service), 200
+        return jsonify(service), 200
     
     return jsonify({"error": "Service id is not found."}), 404
 
@@ -118,22 +230,33 @@ def edit_serviceTicket(service_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
     
-    query= select(Service_tickets).where(Service_tickets.id == service_id)
-    service = db.session.execute(query).scalars().first()
+    service = db.session.get(Service_tickets, service_id)
 
     if not service:
         return jsonify({"Message": "Service ticket not found."}), 404
 
+    add_ids = service_edits.get('add_mechanic_ids',[])
+    remove_ids = service_edits.get('remove_mechanic_ids',[])
+
+    # One query for the current assignments and one to validate every requested id, then the edits are
+    # applied as a set diff in memory (adds first, then removes) instead of a lookup + list scan per id.
+    query = select(mechanic_services.c.mechanic_id).where(mechanic_services.c.service_id == service_id)
+    assigned = set(db.session.execute(query).scalars().all())
+
+    requested = set(add_ids) | set(remove_ids)
+    query = select(Mechanics.id).where(Mechanics.id.in_(requested))
+    existing = set(db.session.execute(query).scalars().all()) if requested else set()
+
     messages = []
+    to_insert = set()
+    to_delete = set()
 
     # Add mechanics
-    for mechanic_id in service_edits.get('add_mechanic_ids',[]):
-        query = select(Mechanics).where(Mechanics.id == mechanic_id)
-        mechanic = db.session.execute(query).scalars().first()
-
-        if mechanic:
-            if mechanic not in service.mechanics:
-                service.mechanics.append(mechanic)
+    for mechanic_id in add_ids:
+        if mechanic_id in existing:
+            if mechanic_id not in assigned:
+                assigned.add(mechanic_id)
+                to_insert.add(mechanic_id)
                 messages.append(f"Successfully added item to the mechanic id: {mechanic_id}")                    
             else:
                  messages.append(f"Details is {mechanic_id} already included in this service_tickets.")
@@ -141,19 +264,28 @@ def edit_serviceTicket(service_id):
              messages.append(f"Mechanic id: {mechanic_id} does not exist.")
 
     # Remove mechanics
-    for mechanic_id in service_edits.get('remove_mechanic_ids',[]):
-        query = select(Mechanics).where(Mechanics.id == mechanic_id)
-        mechanic = db.session.execute(query).scalars().first()
-
-        if mechanic:
-            if mechanic in service.mechanics:
-                service.mechanics.remove(mechanic)    
+    for mechanic_id in remove_ids:
+        if mechanic_id in existing:
+            if mechanic_id in assigned:
+                assigned.remove(mechanic_id)
+                if mechanic_id in to_insert: # added and removed in the same request, nothing to write
+                    to_insert.remove(mechanic_id)
+                else:
+                    to_delete.add(mechanic_id)
                 messages.append(f"Succefully removed mechanic id: {mechanic_id}")
             else:
                 messages.append(f"Invalid {mechanic_id} is not attached to this service ticket.")
         else:
             messages.append(f"{mechanic_id} does not exist.")
+
+    if to_insert: # one bulk INSERT
+        db.session.execute(insert(mechanic_services),
+                           [{"mechanic_id": mechanic_id, "service_id": service_id} for mechanic_id in sorted(to_insert)])
+    if to_delete: # one bulk DELETE
+        db.session.execute(delete(mechanic_services).where(mechanic_services.c.service_id == service_id,
+                                                           mechanic_services.c.mechanic_id.in_(to_delete)))
     db.session.commit()
+    invalidate("service_tickets")
 
     return jsonify({
         "Messages": "New service ticket details added successfully and Remove successfully",
@@ -203,6 +335,7 @@ def delete_service(id):
     
     db.session.delete(service)
     db.session.commit()
+    invalidate("service_tickets")
     return jsonify({"message": f'service id: {id}, successfully deleted.'}), 200
     
 ##============ Update Specific Service_ticket and Mechanic details Using (PUT) =============#
@@ -218,6 +351,7 @@ def add_mechanic(service_id,mechanic_id):
          if mechanic not in service.mechanics:
              service.mechanics.append(mechanic)
              db.session.commit()
+             invalidate("service_tickets")
              return jsonify({"Message": f"Successfully added item to the mechanic id is: {mechanic_id}  form service ticket id is: {service_id}."}), 200
          else:
             return jsonify({"Message" : "Details is already included in this service_tickets."}),400
@@ -241,6 +375,7 @@ def remove_mechanic(service_id,mechanic_id):
          else:
              service.mechanics.remove(mechanic)
              db.session.commit()
+             invalidate("service_tickets")
              return jsonify({"Message" : f"Succefully removed the mechanic id is: {mechanic_id}  form service ticket id is: {service_id}."}),200
      else:
          return jsonify({"Message": "Invalid service_id or mechanic_id"}), 400
@@ -260,6 +395,7 @@ def delete_mechanic(service_id,mechanic_id):
           else:
             db.session.delete(mechanic)
             db.session.commit()
+            unindex_mechanic(mechanic_id, invalidate("mechanics", "service_tickets"))
             return jsonify({"message": f"succefully deleted the mechanic: {mechanic_id} and the product id is :{service_id}"}), 200
      else:
 
@@ -280,6 +416,10 @@ def add_inventory(service_id):
 
     if not inventory_id or not quantity:
         return jsonify({"Message": "Both inventory_id and quantity are required."}), 400
+    try:
+        inventory_id = int(inventory_id)  # "1" was accepted before the upsert, keep accepting it
+    except (TypeError, ValueError):
+        return jsonify({"Message": "inventory_id must be an integer."}), 400
     try:
         quantity = int(quantity)
     except (TypeError, ValueError):
@@ -295,27 +435,65 @@ def add_inventory(service_id):
     if not service or not inventory:
         return jsonify({"Message": "Invalid service id or inventory id."}), 400
 
-    # Check if this inventory already linked to this service ticket
-    query = select(ServiceInventory).filter_by(
-        service_ticket_id=service_id,
-        inventory_id=inventory_id )
-    existing = db.session.execute(query).scalars().first()
+    # Insert the link or add to its quantity in one atomic upsert (safe under concurrent requests)
+    quantities = upsert_service_parts(service_id, {inventory.id: quantity})
+    response = jsonify({"Message": "Part added to service ticket successfully.",
+                        "service_ticket_id": service_id,
+                        "inventory_id": inventory.id,
+                        "quantity": quantities[inventory.id]})  # return total quantity, built before the commit
+    db.session.commit()
+    invalidate("service_tickets")
 
-    if existing:
-        existing.quantity += quantity  # If already exists, just update quantity
-        db.session.commit()
-        updated_quantity = existing.quantity   #  updated quantity
-    else:
-            # Create new association
-        new_link = ServiceInventory(
-            service_ticket_id=service_id,
-            inventory_id=inventory_id,
-            quantity=quantity
-        )
-        db.session.add(new_link)
-        db.session.commit()
-        updated_quantity = quantity    # starting quantity
-    return jsonify({"Message": "Part added to service ticket successfully.",
+    return response, 200
+
+
+def upsert_service_parts(service_id, quantities):
+    ### Adds {inventory_id: quantity} to a ticket with one native upsert on the (service_ticket_id, inventory_id) ###
+    ### unique constraint, then returns the resulting total quantity of each part. The caller commits.            ###
+    service_inventory = ServiceInventory.__table__
+    statement = upsert_statement(service_inventory, ["service_ticket_id", "inventory_id"],
+                                 lambda incoming: {"quantity": service_inventory.c.quantity + incoming.quantity})
+    db.session.execute(statement, [{"service_ticket_id": service_id, "inventory_id": inventory_id, "quantity": quantity}
+                                   for inventory_id, quantity in quantities.items()])
+
+    query = (select(ServiceInventory.inventory_id, ServiceInventory.quantity)
+             .where(ServiceInventory.service_ticket_id == service_id, ServiceInventory.inventory_id.in_(quantities)))
+    return dict(db.session.execute(query).all())
+
+
+##============ Add many parts(inventory) to a Service_ticket in one request Using (POST) =============#
+
+## Body: {"parts": [{"inventory_id": 1, "quantity": 2}, ...]}. All inventory ids are validated with one query
+## and the whole list is written with one upsert and one commit, nothing is written if any id is invalid.
+
+@serviceTickets_bp.route('/<int:service_id>/add_parts', methods=['POST'])
+def add_inventories(service_id):
+
+    try:
+        parts = add_parts_schema.load(request.json)['parts']
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    service = db.session.get(Service_tickets, service_id)
+    if not service:
+        return jsonify({"Message": "Invalid service id."}), 400
+
+    quantities = {}
+    for part in parts: # the same part listed twice is added up
+        quantities[part['inventory_id']] = quantities.get(part['inventory_id'], 0) + part['quantity']
+
+    query = select(Inventory.id).where(Inventory.id.in_(quantities))
+    found_ids = set(db.session.execute(query).scalars().all())
+    invalid_ids = [inventory_id for inventory_id in quantities if inventory_id not in found_ids]
+
+    if invalid_ids:
+        return jsonify({"Message": f"Invalid inventory id: {', '.join(str(inventory_id) for inventory_id in invalid_ids)}",
+                        "invalid_inventory_ids": invalid_ids}), 400
+
+    totals = upsert_service_parts(service_id, quantities)
+    db.session.commit()
+    invalidate("service_tickets")
+
+    return jsonify({"Message": "Parts added to service ticket successfully.",
                     "service_ticket_id": service_id,
-            "inventory_id": inventory_id,
-            "quantity": updated_quantity  }), 200  # return total quantity
\ No newline at end of file
+                    "parts": [{"inventory_id": inventory_id, "quantity": totals[inventory_id]} for inventory_id in quantities]}), 200
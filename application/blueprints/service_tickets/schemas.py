@@ -1,7 +1,8 @@
 
 from application.extensions import ma
 from application.models import Service_tickets
-from marshmallow import fields
+from application.utils.row_serializers import RowSerializer
+from marshmallow import fields, validate
 
 #====Schema =====#
 class ServiceTicketSchema(ma.SQLAlchemyAutoSchema):
@@ -25,6 +26,23 @@ class ServiceTicketCreateSchema(ma.Schema):
     mechanic_ids  = fields.List(fields.Int(), required=True)
 
 
+# # === export schema (flat rows for /export, no nested customer details) ===
+
+class ServiceTicketExportSchema(ma.SQLAlchemyAutoSchema):
+    mechanic_ids = fields.Pluck("MechanicSchema", "id", many=True, attribute="mechanics")
+    parts = fields.Method("get_parts")
+
+    class Meta:
+        model= Service_tickets
+        include_fk = True
+
+    def get_parts(self, service):
+        return [{"inventory_id": part.inventory_id,
+                 "name": part.inventory.name,
+                 "price": part.inventory.price,
+                 "quantity": part.quantity} for part in service.service_inventories]
+
+
 class EditServiceSchema(ma.Schema):
     add_mechanic_ids = fields.List(fields.Int(),required = True)
     remove_mechanic_ids = fields.List(fields.Int(),required = True)
@@ -33,9 +51,21 @@ class EditServiceSchema(ma.Schema):
         fields = ("add_mechanic_ids","remove_mechanic_ids")
 
 
+class ServicePartSchema(ma.Schema):
+    inventory_id = fields.Int(required=True)
+    quantity = fields.Int(required=True, validate=validate.Range(min=1))
+
+
+class AddPartsSchema(ma.Schema):
+    parts = fields.List(fields.Nested(ServicePartSchema), required=True, validate=validate.Length(min=1))
+
+
 service_ticket_schema = ServiceTicketSchema()
 service_tickets_schema = ServiceTicketSchema(many=True)
+service_tickets_rows = RowSerializer(service_tickets_schema)  ## GET /service-tickets/ and /my-tickets pages, same output from Core rows
 
 return_service_schema = ServiceTicketSchema(exclude = ['customer_id'])
 edit_service_schema = EditServiceSchema()
-service_ticket_create_schema = ServiceTicketCreateSchema()
\ No newline at end of file
+service_ticket_create_schema = ServiceTicketCreateSchema()
+service_tickets_export_schema = ServiceTicketExportSchema(many=True)
+add_parts_schema = AddPartsSchema()
\ No newline at end of file
@@ -3,12 +3,23 @@ from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_caching import Cache
+from application.utils.metrics import RequestMetrics
+from application.utils.querycheck import QueryDetector
+from application.utils.compression import Compress
+from application.utils.lifecycle import Lifecycle
+from application.utils.rate_limits import request_cost  ## also registers the batched+redis:// limiter storage
 
 ma=Marshmallow()                             
-limiter= Limiter(key_func=get_remote_address,default_limits=["10000 per day", "50 per minute"]) ## default for all routes in production
+limiter= Limiter(key_func=get_remote_address,default_limits=["10000 per day", "50 per minute"], ## default for all routes in production
+                 default_limits_cost=request_cost) ## expensive endpoints take more than 1 from the default budget (RATELIMIT_COSTS)
     ### Creating and instance of Limiter
     ### Global limit for all routes (can be overridden per route)
     ## limit all routes to 50 requests/minute by default 
     ## Adding the default_limits to the Limiter setup provides blanket protection to all routes, so you don’t need to decorate each one manually.
 
-cache = Cache()
\ No newline at end of file
+cache = Cache()
+
+metrics = RequestMetrics() ## per endpoint latency/SQL/serialization/response size histograms, served at /metrics
+query_detector = QueryDetector() ## opt-in N+1 / query budget checks, enabled from TestingConfig
+compress = Compress() ## gzip/br/zstd response compression negotiated from Accept-Encoding
+lifecycle = Lifecycle() ## /ready once the db pool is warm, `flask create-db`
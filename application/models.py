@@ -1,7 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from datetime import date
-from typing import List
+from typing import List, Optional
 
 
 # Create a base class for our models
@@ -31,14 +31,16 @@ class Customer(Base):
 # Association Table
 
 mechanic_services = db.Table('mechanic_services', Base.metadata,
-                   db.Column('mechanic_id',db.ForeignKey('mechanics.id')),
-                   db.Column('service_id',db.ForeignKey('service_tickets.id')))
+                   db.Column('mechanic_id',db.ForeignKey('mechanics.id'), primary_key=True),  # composite PK: no duplicate assignments,
+                   db.Column('service_id',db.ForeignKey('service_tickets.id'), primary_key=True), # and lookups/GROUP BY by mechanic_id use it
+                   db.Index('ix_mechanic_services_service_id', 'service_id'))  # ticket -> mechanics lookups
 
 
 #Creating a Model for a Junction Table
 
 class ServiceInventory(Base):
     __tablename__ = 'service_inventory'
+    __table_args__ = (db.UniqueConstraint('service_ticket_id', 'inventory_id', name='uq_service_inventory_ticket_part'),) # one row per part per ticket, target of the add_part upsert
 
     id: Mapped[int] = mapped_column(primary_key=True)
     service_ticket_id: Mapped[int] = mapped_column(db.ForeignKey('service_tickets.id'), nullable=False)
@@ -64,6 +66,8 @@ class Mechanics(Base):
 
 class Service_tickets(Base):
     __tablename__ = 'service_tickets'
+    __table_args__ = (db.Index('ix_service_tickets_customer_date', 'customer_id', 'service_date'),  # /my-tickets and per-customer history
+                      db.Index('ix_service_tickets_vin', 'VIN'))  # lookups by vehicle
 
 
     id: Mapped[int]=mapped_column(primary_key=True)
@@ -87,6 +91,7 @@ class Inventory(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(db.String(225),nullable= False)
     price: Mapped[float] = mapped_column(db.Float(), nullable= False)
+    sku: Mapped[Optional[str]] = mapped_column(db.String(100), nullable= True, unique=True) # supplier part number, natural key for catalog imports
     
       #Creating a relationship between Inventory and Service_tickets through service_inventory.
     service_inventories: Mapped[List['ServiceInventory']] = db.relationship(back_populates ='inventory')
\ No newline at end of file
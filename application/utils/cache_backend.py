@@ -0,0 +1,61 @@
+# application/utils/cache_backend.py
+import pickle
+import zlib
+from cachelib.serializers import RedisSerializer
+from flask_caching.backends.rediscache import RedisCache
+from werkzeug.utils import import_string
+
+
+class CompressedSerializer(RedisSerializer):
+    ### Pickle like the default redis serializer, zlib-compressed above `threshold` bytes (large cached list responses) ###
+
+    def __init__(self, threshold=1024, level=6):
+        self.threshold = threshold
+        self.level = level
+
+    def dumps(self, value, protocol=pickle.HIGHEST_PROTOCOL):
+        data = pickle.dumps(value, protocol)
+        if len(data) > self.threshold:
+            return b"z" + zlib.compress(data, self.level)
+        return b"!" + data
+
+    def loads(self, value):
+        if value is not None and value.startswith(b"z"):
+            try:
+                return pickle.loads(zlib.decompress(value[1:]))
+            except (zlib.error, pickle.PickleError):
+                return None
+        return super().loads(value)
+
+
+SERIALIZERS = {
+    "pickle": RedisSerializer,
+    "compressed": CompressedSerializer,
+}
+
+
+def make_serializer(name):
+    ### CACHE_SERIALIZER: "pickle", "compressed", or the import path of a class with dumps()/loads() ###
+    serializer = SERIALIZERS.get(name) or import_string(name)
+    return serializer()
+
+
+class SharedRedisCache(RedisCache):
+    ### Redis cache shared by every worker, CACHE_TYPE = "application.utils.cache_backend.SharedRedisCache".     ###
+    ### CACHE_REDIS_URL may be "fakeredis://" to run against an in-process stand-in (tests, local runs without a ###
+    ### server). CACHE_SERIALIZER picks how values are encoded.                                                    ###
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        redis_url = config.get("CACHE_REDIS_URL") or ""
+        if redis_url.startswith("fakeredis://"):
+            import fakeredis
+            kwargs["host"] = fakeredis.FakeStrictRedis()
+            if config.get("CACHE_KEY_PREFIX"):
+                kwargs["key_prefix"] = config["CACHE_KEY_PREFIX"]
+            cache = cls(*args, **kwargs)
+        else:
+            cache = super().factory(app, config, args, kwargs)
+
+        cache.serializer = make_serializer(config.get("CACHE_SERIALIZER", "pickle"))
+        return cache
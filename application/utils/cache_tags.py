@@ -0,0 +1,92 @@
+# application/utils/cache_tags.py
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, request
+from application.extensions import cache
+from application.utils.compression import compress_response, etag_variants, negotiate_encoding
+
+## Tag-based invalidation for cached GET views.
+## Every tag ("inventories", "mechanics", ...) has a version stored in the cache. A cached response's key contains the
+## versions of its tags, so invalidate("inventories") only has to write a new version: every response cached under
+## the old one stops being reachable and simply expires. Works the same with SimpleCache and the shared redis cache,
+## and no worker has to know which keys other workers created.
+
+def tag_key(tag):
+    return f"tag:{tag}"
+
+
+def tag_versions(*tags):
+    ### Current version of each tag, starting new tags (or ones the cache evicted) at a fresh unique value ###
+    keys = [tag_key(tag) for tag in tags]
+    versions = list(cache.get_many(*keys))
+    for position, version in enumerate(versions):
+        if version is None:
+            cache.add(keys[position], time.time_ns(), timeout=0)  # add() keeps the value another worker may have set first
+            versions[position] = cache.get(keys[position])
+    return dict(zip(tags, versions))
+
+
+def invalidate(*tags): # call after the write is committed; returns {tag: (previous version, new version)}
+    keys = [tag_key(tag) for tag in tags]
+    changes = {}
+    for tag, key, previous in zip(tags, keys, cache.get_many(*keys)):
+        version = time.time_ns()
+        cache.set(key, version, timeout=0)
+        changes[tag] = (previous, version)
+    return changes
+
+
+def request_query():
+    return urlencode(sorted(request.args.items(multi=True)))
+
+
+def cached_view(*tags, timeout=None):
+    ### Caches a GET view whose response depends on `tags` and the query string; only 200s are cached. Entries are ###
+    ### stored per negotiated Content-Encoding, already compressed, so a hit skips serialization and compression.  ###
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            encoding = negotiate_encoding()
+            versions = ",".join(f"{tag}={version}" for tag, version in tag_versions(*tags).items())
+            key = f"view:{request.path}?{request_query()}#{versions}|{encoding or 'identity'}"
+
+            cached = cache.get(key)
+            if cached is not None:
+                headers, body = cached
+                return current_app.response_class(body, status=200, headers=headers)
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                compress_response(response, encoding)
+                cache.set(key, (list(response.headers.items()), response.get_data()), timeout=timeout)
+            return response
+        return decorated
+    return decorator
+
+
+def etag_view(*tags):
+    ### Strong ETag from the tag versions, the url and the view arguments (e.g. the customer id of /my-tickets), so it is ###
+    ### known before the view runs: a matching If-None-Match gets 304 without the query or serialization.               ###
+    ### Only for views whose data changes solely through writes that invalidate `tags`.                                    ###
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            versions = tag_versions(*tags)
+            source = f"{request.path}?{request_query()}|{args}|{sorted(kwargs.items())}|{sorted(versions.items())}"
+            etag = hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+            for variant in etag_variants(etag):  # the client may hold the ETag of a compressed representation
+                if request.if_none_match.contains_weak(variant):
+                    response = current_app.response_class(status=304)
+                    response.set_etag(variant)
+                    return response
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                encoding = response.headers.get("Content-Encoding")  # already compressed by cached_view
+                response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+            return response
+        return decorated
+    return decorator
@@ -0,0 +1,148 @@
+# application/utils/compression.py
+import gzip
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional, br is only offered when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, zstd is only offered when installed
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html",
+                          "text/css", "application/javascript", "application/yaml", "text/yaml"}
+
+
+#================= Codecs =================#
+
+class GzipCodec:
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, self.level, mtime=0)  # mtime=0: same input, same bytes
+
+    def stream(self, chunks):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)  # flush so each chunk reaches the client
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class BrotliCodec:
+    def __init__(self, quality=4):
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self, chunks):
+        compressor = brotli.Compressor(quality=self.quality)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class ZstdCodec:
+    def __init__(self, level=3):
+        self.level = level
+
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self, chunks):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def available_codecs(): # in server preference order, best ratio/speed first
+    codecs = {}
+    if zstandard is not None:
+        codecs["zstd"] = ZstdCodec()
+    if brotli is not None:
+        codecs["br"] = BrotliCodec()
+    codecs["gzip"] = GzipCodec()
+    return codecs
+
+
+CODECS = available_codecs()
+
+
+#================= Negotiation =================#
+
+def negotiate_encoding():
+    ### Best encoding both sides accept, or None for identity (or when compression is off) ###
+    if not current_app.config.get("COMPRESS_ENABLED", True):
+        return None
+    allowed = [name for name in current_app.config.get("COMPRESS_ALGORITHMS", ["zstd", "br", "gzip"]) if name in CODECS]
+    return request.accept_encodings.best_match(allowed)
+
+
+def etag_variants(etag): # the plain ETag and the per-encoding ones compress_response() hands out
+    return [etag] + [f"{etag}-{name}" for name in CODECS]
+
+
+def compressible(response):
+    return (response.mimetype in COMPRESSIBLE_MIMETYPES and 200 <= response.status_code < 300
+            and response.status_code != 204 and not response.direct_passthrough and "Content-Encoding" not in response.headers)
+
+
+def compress_response(response, encoding, min_size=None):
+    ### Compresses the body in place (or wraps the stream); below min_size bytes it is left alone ###
+    if response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add("Accept-Encoding")
+    if encoding is None or not compressible(response):
+        return response
+
+    codec = CODECS[encoding]
+    if response.is_streamed:
+        chunks = response.response
+        response.response = codec.stream(chunk.encode() if isinstance(chunk, str) else chunk for chunk in chunks)
+        response.headers.pop("Content-Length", None)
+        if hasattr(chunks, "close"):  # werkzeug only closes the iterable it is given, which is now the wrapper
+            response.call_on_close(chunks.close)
+    else:
+        if min_size is None:
+            min_size = current_app.config.get("COMPRESS_MIN_SIZE", 1024)
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(codec.compress(data))
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:  # a compressed body is a different representation, so it gets its own strong ETag
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+class Compress:
+    ### After-request compression (gzip always, br/zstd when brotli/zstandard are installed), negotiated from ###
+    ### Accept-Encoding. Bodies under COMPRESS_MIN_SIZE bytes are sent as is; streamed bodies are compressed    ###
+    ### chunk by chunk. Views cached with cached_view() are stored already compressed and skip this step.      ###
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get("COMPRESS_ENABLED", True):
+            app.after_request(compress_after_request)
+
+
+def compress_after_request(response):
+    if "Content-Encoding" in response.headers or request.method == "HEAD":
+        return response
+    return compress_response(response, negotiate_encoding())
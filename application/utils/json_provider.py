@@ -0,0 +1,65 @@
+# application/utils/json_provider.py
+import decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib provider is used without it
+    orjson = None
+
+
+def orjson_default(o): # types orjson does not encode natively, same results as Flask's provider
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    ### app.json backed by orjson: used by jsonify, schema.jsonify (flask-marshmallow calls flask.jsonify), ###
+    ### request.get_json and current_app.json.dumps. dates/datetimes/UUIDs/dataclasses are encoded natively ###
+    ### (dates as ISO 8601). Keys stay sorted like the stdlib provider; output is UTF-8, not ASCII-escaped.   ###
+
+    def options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:  # json.dumps-only arguments (cls, separators, ...), keep their exact meaning
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def dumps_bytes(self, obj, indent=False):
+        try:
+            return orjson.dumps(obj, default=orjson_default, option=self.options(indent))
+        except orjson.JSONEncodeError:  # e.g. integers over 64 bits, which the stdlib encoder accepts
+            return super().dumps(obj, indent=2 if indent else None, separators=None if indent else (",", ":")).encode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    "stdlib": DefaultJSONProvider,
+    "orjson": ORJSONProvider,
+}
+
+
+def init_json_provider(app):
+    ### JSON_PROVIDER = "orjson" (default, falls back to "stdlib" when orjson is not installed) or "stdlib" ###
+    name = app.config.get("JSON_PROVIDER", "orjson")
+    if name == "orjson" and orjson is None:
+        name = "stdlib"
+    app.json = JSON_PROVIDERS[name](app)
@@ -0,0 +1,120 @@
+# application/utils/lifecycle.py
+import os
+import time
+import click
+from flask import current_app, jsonify
+from flask.cli import with_appcontext
+from sqlalchemy import exc, text
+from sqlalchemy.pool import QueuePool
+from application.models import db
+from application.utils.querycheck import batched_queries
+
+## Process lifecycle for the production server (wsgi.py + gunicorn.conf.py).
+## gunicorn preloads wsgi.py once and forks the workers, so any connection the master opened would be shared by every
+## child: dispose_engines() runs in each child right after fork and drops the inherited pool without closing the
+## parent's sockets. Each worker then warms its own pool (warm_up) and only after that does /ready answer 200, so a load
+## balancer never routes to a worker that still has to open its first database connections. When the database cannot
+## be reached the worker stays up and unready (try_warm_up), and the next /ready probe retries the warm up.
+
+
+class Lifecycle:
+    ### /ready endpoint and the `flask create-db` command ###
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["lifecycle"] = {"ready": False, "warm_connections": 0, "warm_up_error": None, "warm_up_at": 0.0}
+        app.add_url_rule(app.config.get("READINESS_PATH", "/ready"), "ready", ready_view)
+        for limiter in app.extensions.get("limiter", ()):  # health checks are not client traffic
+            limiter.exempt(ready_view)
+        app.cli.add_command(create_db_command)
+
+
+@batched_queries  # a warm up retry pings every pooled connection
+def ready_view():
+    state = current_app.extensions["lifecycle"]
+    retry_after = current_app.config.get("READINESS_RETRY_SECONDS", 5)
+    if not state["ready"] and state["warm_up_error"] and time.monotonic() - state["warm_up_at"] >= retry_after:
+        try_warm_up(current_app._get_current_object())
+    if not state["ready"]:
+        if state["warm_up_error"]:
+            return jsonify({"status": "database unavailable"}), 503
+        return jsonify({"status": "starting"}), 503
+    return jsonify({"status": "ready", "pid": os.getpid(), "warm_connections": state["warm_connections"]}), 200
+
+
+@click.command("create-db")
+@with_appcontext
+def create_db_command():
+    ### Creates the missing tables. Run once per deploy (flask --app wsgi create-db), not at startup ###
+    db.create_all()
+    click.echo("Database tables created.")
+
+
+def engines(app):
+    with app.app_context():
+        return list(app.extensions["sqlalchemy"].engines.values())
+
+
+def dispose_engines(app):
+    ### In a forked child: forget the connections inherited from the parent (close=False leaves them to the parent) ###
+    for engine in engines(app):
+        engine.dispose(close=False)
+    app.extensions["lifecycle"]["ready"] = False
+
+
+def register_fork_safety(app):
+    ### Runs dispose_engines() in every child forked from this process, whatever the server ###
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: dispose_engines(app))
+
+
+def warm_up(app, connections=None):
+    ### Opens `connections` (default: the pool size) connections at once, checks each with SELECT 1 and returns ###
+    ### them to the pool, then marks the process ready. Database errors propagate and the process stays unready. ###
+    warmed = 0
+    for engine in engines(app):
+        size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+        opened = []
+        try:
+            for _ in range(connections or size):
+                conn = engine.connect()
+                opened.append(conn)
+                conn.execute(text("SELECT 1"))
+        finally:
+            for conn in opened:
+                conn.close()  # back to the pool, still open
+        warmed += len(opened)
+    state = app.extensions["lifecycle"]
+    state["warm_connections"] = warmed
+    state["warm_up_error"] = None
+    state["ready"] = True
+    return warmed
+
+
+def try_warm_up(app, connections=None):
+    ### warm_up() for server hooks: a database error is logged and leaves the process up but unready, and GET /ready ###
+    ### retries at most every READINESS_RETRY_SECONDS. Returns the warmed connections, or None when it failed.        ###
+    state = app.extensions["lifecycle"]
+    state["warm_up_at"] = time.monotonic()
+    try:
+        return warm_up(app, connections)
+    except exc.SQLAlchemyError as e:
+        state["warm_up_error"] = type(e.orig if isinstance(e, exc.DBAPIError) else e).__name__
+        app.logger.warning("database warm up failed, not ready: %s", e)
+        return None
+
+
+def shutdown(app):
+    ### Worker exit: stop reporting ready, send batched rate limit hits, close the pool ###
+    state = app.extensions["lifecycle"]
+    state["ready"] = False
+    state["warm_up_error"] = None  # no more warm up retries from /ready
+    for limiter in app.extensions.get("limiter", ()):
+        flush = getattr(limiter.storage, "flush", None)
+        if flush is not None:
+            flush()
+    for engine in engines(app):
+        engine.dispose()
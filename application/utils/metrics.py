@@ -0,0 +1,254 @@
+# application/utils/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, current_app, g, request
+from marshmallow import Schema
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)  # queries per request
+SQL_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # seconds per request
+SERIALIZE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)  # seconds per request
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # bytes
+POOL_CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+HISTOGRAMS = (  # (metric name, help text, buckets)
+    ("http_request_duration_seconds", "Request latency per endpoint.", LATENCY_BUCKETS),
+    ("http_request_sql_queries", "SQL statements executed per request.", SQL_COUNT_BUCKETS),
+    ("http_request_sql_seconds", "Total SQL execution time per request.", SQL_TIME_BUCKETS),
+    ("http_request_serialization_seconds", "Serialization time per request (marshmallow dumps and row serializers).", SERIALIZE_BUCKETS),
+    ("http_response_size_bytes", "Response body size (streamed responses are not counted).", SIZE_BUCKETS),
+)
+
+
+class Histogram:
+    ### Fixed-bucket histogram, observe() only bumps two numbers in preallocated slots ###
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class PoolMetrics:
+    ### Checkout time and timeouts of one engine's connection pool; size/checked out/overflow are read at scrape time. ###
+    ### Checkout time covers waiting for a free connection, opening a new one and the pre-ping.                        ###
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.checkout = Histogram(POOL_CHECKOUT_BUCKETS)
+        self.timeouts = 0
+        self.lock = threading.Lock()
+        self.instrument(engine.pool)
+        event.listen(engine, "engine_disposed", lambda engine: self.instrument(engine.pool))  # dispose() builds a new pool
+
+    def instrument(self, pool):
+        connect = pool.connect  # Engine.raw_connection() calls pool.connect() for every checkout
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            except exc.TimeoutError:  # pool_timeout passed with every connection checked out
+                with self.lock:
+                    self.timeouts += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                with self.lock:
+                    self.checkout.observe(elapsed)
+
+        pool.connect = timed_connect
+
+    def gauges(self): # (name, value) read from the current pool, only QueuePool has a fixed capacity
+        pool = self.engine.pool
+        if not isinstance(pool, QueuePool):
+            return []
+        gauges = [("db_pool_size", pool.size()), ("db_pool_checked_out", pool.checkedout()), ("db_pool_overflow", pool.overflow())]
+        max_overflow = getattr(pool, "_max_overflow", -1)
+        if max_overflow >= 0:  # -1 = unlimited overflow, no saturation point
+            gauges.append(("db_pool_saturation", pool.checkedout() / max(pool.size() + max_overflow, 1)))
+        return gauges
+
+
+POOL_GAUGES = (
+    ("db_pool_size", "Connections kept open by the pool (pool_size)."),
+    ("db_pool_checked_out", "Connections currently in use."),
+    ("db_pool_overflow", "Connections open beyond pool_size (negative while the pool is not full yet)."),
+    ("db_pool_saturation", "Checked out connections / (pool_size + max_overflow); at 1 requests wait up to pool_timeout."),
+)
+
+
+class MetricsRegistry:
+    ### Per-app aggregates: one dict keyed by endpoint name (bounded by the url map), so memory stays flat ###
+
+    def __init__(self):
+        self.endpoints = {}  # endpoint -> list of Histogram, in HISTOGRAMS order
+        self.statuses = {}   # (endpoint, status code) -> request count
+        self.pools = []      # PoolMetrics per engine
+        self.lock = threading.Lock()
+
+    def observe(self, endpoint, status, duration, sql_count, sql_time, serialize_time, size):
+        with self.lock:
+            histograms = self.endpoints.get(endpoint)
+            if histograms is None:
+                histograms = self.endpoints[endpoint] = [Histogram(buckets) for _, _, buckets in HISTOGRAMS]
+            histograms[0].observe(duration)
+            histograms[1].observe(sql_count)
+            histograms[2].observe(sql_time)
+            histograms[3].observe(serialize_time)
+            if size is not None:
+                histograms[4].observe(size)
+            key = (endpoint, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def render(self):
+        with self.lock:
+            lines = ["# HELP http_requests_total Requests per endpoint and status code.",
+                     "# TYPE http_requests_total counter"]
+            for (endpoint, status), count in sorted(self.statuses.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+            for position, (name, help_text, _) in enumerate(HISTOGRAMS):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for endpoint, histograms in sorted(self.endpoints.items()):
+                    lines.extend(histograms[position].render(name, f'endpoint="{endpoint}"'))
+        lines.extend(self.render_pools())
+        return "\n".join(lines) + "\n"
+
+    def render_pools(self):
+        if not self.pools:
+            return []
+        lines = ["# HELP db_pool_checkout_seconds Time to get a connection from the pool.",
+                 "# TYPE db_pool_checkout_seconds histogram"]
+        for pool in self.pools:
+            with pool.lock:
+                lines.extend(pool.checkout.render("db_pool_checkout_seconds", f'pool="{pool.name}"'))
+        lines.extend(["# HELP db_pool_timeouts_total Checkouts that gave up after pool_timeout.",
+                      "# TYPE db_pool_timeouts_total counter"])
+        lines.extend(f'db_pool_timeouts_total{{pool="{pool.name}"}} {pool.timeouts}' for pool in self.pools)
+        values = {pool.name: dict(pool.gauges()) for pool in self.pools}
+        for name, help_text in POOL_GAUGES:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} gauge"])
+            lines.extend(f'{name}{{pool="{pool}"}} {gauges[name]}' for pool, gauges in values.items() if name in gauges)
+        return lines
+
+
+class RequestMetrics:
+    ### Per-endpoint request instrumentation, exposed in Prometheus text format at /metrics.             ###
+    ### Each request only keeps a few numbers on `g` that the SQLAlchemy/marshmallow hooks add to; they   ###
+    ### are folded into the app's MetricsRegistry after the request.                                     ###
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["request_metrics"] = MetricsRegistry()
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+
+        app.before_request(start_request)
+        app.after_request(finish_request)
+        with app.app_context():
+            for bind_key, engine in app.extensions["sqlalchemy"].engines.items():
+                event.listen(engine, "before_cursor_execute", before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", after_cursor_execute)
+                app.extensions["request_metrics"].pools.append(PoolMetrics(bind_key or "default", engine))
+        instrument_marshmallow()
+
+        app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", metrics_view)
+        for limiter in app.extensions.get("limiter", ()):  # scrapes are not client traffic
+            limiter.exempt(metrics_view)
+
+
+def start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_time = 0.0
+    g.metrics_serialize_time = 0.0
+    g.metrics_dump_depth = 0
+
+
+def finish_request(response):
+    started = g.pop("metrics_started", None)
+    if started is None:  # before_request never ran, e.g. the rate limiter rejected the request first
+        return response
+
+    size = None if response.is_streamed else response.calculate_content_length()
+    current_app.extensions["request_metrics"].observe(
+        request.endpoint or "unmatched", response.status_code, time.perf_counter() - started,
+        g.metrics_sql_count, g.metrics_sql_time, g.metrics_serialize_time, size)
+    return response
+
+
+def metrics_view():
+    return Response(current_app.extensions["request_metrics"].render(),
+                    content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+#================= SQLAlchemy engine events =================#
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    if g and "metrics_started" in g:  # queries outside a request (create_all, cli) are not recorded
+        g.metrics_sql_count += 1
+        g.metrics_sql_time += time.perf_counter() - started
+
+
+#================= Marshmallow serialization timing =================#
+
+@contextmanager
+def serialization_timer():
+    ### Adds the time spent in the block to the request's serialization time; nested blocks are only counted once ###
+    if not (g and "metrics_started" in g):
+        yield
+        return
+    g.metrics_dump_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.metrics_dump_depth -= 1
+        if g.metrics_dump_depth == 0:
+            g.metrics_serialize_time += time.perf_counter() - started
+
+
+def instrument_marshmallow():
+    ### Wraps Schema.dump once per process; only the outermost dump is timed so Nested fields are not counted twice ###
+    if getattr(Schema.dump, "metrics_instrumented", False):
+        return
+    dump = Schema.dump
+
+    def timed_dump(self, obj, *args, **kwargs):
+        with serialization_timer():
+            return dump(self, obj, *args, **kwargs)
+
+    timed_dump.metrics_instrumented = True
+    Schema.dump = timed_dump
@@ -0,0 +1,109 @@
+# application/utils/passwords.py
+import hmac
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+HASH_PREFIXES = ("scrypt:", "pbkdf2:")
+
+
+class PasswordPoolBusy(Exception):
+    ### Raised when every hashing slot is taken for longer than PASSWORD_HASH_WAIT seconds, or the hashing itself ###
+    ### does not finish within PASSWORD_HASH_TIMEOUT (PASSWORD_HASH_BULK_TIMEOUT for bulk imports)               ###
+    pass
+
+
+class PasswordHasher:
+    ### Bounded pool for password hashing/verification. hashlib's scrypt/pbkdf2 release the GIL, so the hashing runs   ###
+    ### in parallel on PASSWORD_HASH_WORKERS threads; at most PASSWORD_HASH_MAX_PENDING calls may run or queue at once, ###
+    ### later ones wait up to PASSWORD_HASH_WAIT seconds for a slot and then fail fast with PasswordPoolBusy.           ###
+    ### Bulk imports hash on their own PASSWORD_HASH_BULK_WORKERS threads, one import at a time, so they never queue   ###
+    ### in front of logins.                                                                                          ###
+
+    def __init__(self, method, workers=4, max_pending=32, wait=2.0, timeout=10.0, bulk_workers=2, bulk_timeout=20.0):
+        self.method = method
+        self.wait = wait
+        self.timeout = timeout
+        self.bulk_timeout = bulk_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.bulk_executor = ThreadPoolExecutor(max_workers=bulk_workers, thread_name_prefix="password-hash-bulk")
+        self.bulk_slots = threading.BoundedSemaphore(1)
+        self.dummy_hash = None
+
+    def run(self, fn, *args):
+        if not self.slots.acquire(timeout=self.wait):
+            raise PasswordPoolBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except TimeoutError:
+                future.cancel()
+                raise PasswordPoolBusy()
+        finally:
+            self.slots.release()
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        ### Bulk imports: all hashes within bulk_timeout seconds or PasswordPoolBusy, queued hashes are dropped ###
+        if not self.bulk_slots.acquire(timeout=self.wait):
+            raise PasswordPoolBusy()
+        try:
+            deadline = time.monotonic() + self.bulk_timeout
+            futures = [self.bulk_executor.submit(generate_password_hash, password, self.method) for password in passwords]
+            try:
+                return [future.result(timeout=max(0, deadline - time.monotonic())) for future in futures]
+            except TimeoutError:
+                for future in futures:
+                    future.cancel()
+                raise PasswordPoolBusy()
+        finally:
+            self.bulk_slots.release()
+
+    def verify(self, stored, password):
+        ### Returns (matches, new_hash); new_hash is set when the stored value is plaintext or uses another method/cost ###
+        if not is_hashed(stored):  # rows created before passwords were hashed
+            matches = hmac.compare_digest(stored.encode(), password.encode())
+        else:
+            matches = self.run(check_password_hash, stored, password)
+
+        if matches and self.needs_rehash(stored):
+            return True, self.hash(password)
+        return matches, None
+
+    def verify_unknown(self, password):
+        ### For a login with an unknown email: the same hash check against a dummy hash, so the response takes as ###
+        ### long as a wrong password would and does not reveal which emails are registered. Always (False, None)  ###
+        dummy = self.dummy_hash
+        if dummy is None or self.needs_rehash(dummy):  # built on first use, and again after the method changes
+            dummy = self.dummy_hash = self.hash(secrets.token_hex(16))
+        self.run(check_password_hash, dummy, password)
+        return False, None
+
+    def needs_rehash(self, stored):
+        return not stored.startswith(self.method + "$")
+
+
+def is_hashed(stored):
+    return stored.startswith(HASH_PREFIXES) and stored.count("$") == 2
+
+
+def get_password_hasher(): # one pool per app
+    hasher = current_app.extensions.get("password_hasher")
+    if hasher is None:
+        config = current_app.config
+        hasher = PasswordHasher(config.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1"),
+                                workers=config.get("PASSWORD_HASH_WORKERS", 4),
+                                max_pending=config.get("PASSWORD_HASH_MAX_PENDING", 32),
+                                wait=config.get("PASSWORD_HASH_WAIT", 2.0),
+                                timeout=config.get("PASSWORD_HASH_TIMEOUT", 10.0),
+                                bulk_workers=config.get("PASSWORD_HASH_BULK_WORKERS", 2),
+                                bulk_timeout=config.get("PASSWORD_HASH_BULK_TIMEOUT", 20.0))
+        current_app.extensions["password_hasher"] = hasher
+    return hasher
@@ -0,0 +1,130 @@
+# application/utils/querycheck.py
+import re
+from collections import Counter, deque
+from contextlib import contextmanager
+from flask import current_app, g, request
+from sqlalchemy import event
+
+IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+PARAMS = re.compile(r"%\(\w+\)s|:\w+|\b\d+\b")
+SPACES = re.compile(r"\s+")
+
+
+def query_shape(statement): # same query with different parameters / IN list lengths -> same shape
+    shape = PARAMS.sub("?", statement)
+    shape = IN_LIST.sub("(?)", shape)
+    return SPACES.sub(" ", shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    ### AssertionError so unittest reports a violation as a test failure, not an error ###
+    pass
+
+
+class QueryReport:
+    __slots__ = ("endpoint", "count", "repeated")
+
+    def __init__(self, endpoint, shapes, repeat_threshold):
+        self.endpoint = endpoint
+        self.count = sum(shapes.values())
+        self.repeated = {shape: n for shape, n in shapes.items() if n >= repeat_threshold} # likely lazy loads (N+1)
+
+    def describe(self):
+        lines = [f"{self.endpoint}: {self.count} SQL statements"]
+        lines.extend(f"  x{n}  {shape}" for shape, n in sorted(self.repeated.items(), key=lambda item: -item[1]))
+        return "\n".join(lines)
+
+
+class DetectorState:
+    ### Per-app detector settings and the reports of recent requests ###
+
+    def __init__(self, config):
+        self.repeat_threshold = config.get("QUERY_DETECTOR_REPEAT_THRESHOLD", 5)
+        self.budgets = dict(config.get("QUERY_BUDGETS", {}))  # endpoint -> max statements per request
+        self.raise_on_violation = config.get("QUERY_DETECTOR_RAISE", False)
+        self.reports = deque(maxlen=100)
+        self.collectors = []  # lists receiving every report, one per active query_budget() block
+
+    def violations(self, report, batched=False):
+        problems = []
+        budget = self.budgets.get(report.endpoint)
+        if budget is not None and report.count > budget:
+            problems.append(f"query budget exceeded: {report.count} > {budget}")
+        if report.repeated and not batched:
+            problems.append("repeated query shapes (possible N+1)")
+        return problems
+
+
+def batched_queries(f):
+    ### Marks a view that repeats the same statements on purpose, once per batch/chunk of its input (imports, ###
+    ### bulk creates): the detector does not report its repeated shapes. QUERY_BUDGETS still apply to it.    ###
+    ### Put it directly under @blueprint.route so the registered view carries the mark.                    ###
+    f.batched_queries = True
+    return f
+
+
+class QueryDetector:
+    ### Opt-in N+1 detector (QUERY_DETECTOR_ENABLED). Counts the statements of each request by shape; a request over  ###
+    ### its endpoint budget or repeating one shape QUERY_DETECTOR_REPEAT_THRESHOLD+ times is logged as a warning, or  ###
+    ### raises QueryBudgetExceeded when QUERY_DETECTOR_RAISE is set (the test suite).                                   ###
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get("QUERY_DETECTOR_ENABLED", False):
+            return
+        app.extensions["query_detector"] = DetectorState(app.config)
+
+        app.before_request(start_request)
+        app.after_request(finish_request)
+        with app.app_context():
+            for engine in app.extensions["sqlalchemy"].engines.values():
+                event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def start_request():
+    g.query_shapes = Counter()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if g and "query_shapes" in g:
+        g.query_shapes[query_shape(statement)] += 1
+
+
+def finish_request(response):
+    shapes = g.pop("query_shapes", None)
+    if shapes is None:
+        return response
+
+    state = current_app.extensions["query_detector"]
+    report = QueryReport(request.endpoint or "unmatched", shapes, state.repeat_threshold)
+    state.reports.append(report)
+    for collected in state.collectors:
+        collected.append(report)
+
+    view = current_app.view_functions.get(request.endpoint)
+    problems = state.violations(report, batched=getattr(view, "batched_queries", False))
+    if problems:
+        message = f"{'; '.join(problems)}\n{report.describe()}"
+        if state.raise_on_violation:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+@contextmanager
+def query_budget(app, max_queries, endpoint=None):
+    ### In tests: fail when any request made inside the block runs more than max_queries statements ###
+    ###   with query_budget(self.app, 3): self.client.get('/service-tickets/')                       ###
+    state = app.extensions["query_detector"]
+    collected = []  # its own list: state.reports only keeps the last 100 requests
+    state.collectors.append(collected)
+    try:
+        yield collected
+    finally:
+        state.collectors.remove(collected)
+    for report in collected:
+        if (endpoint is None or report.endpoint == endpoint) and report.count > max_queries:
+            raise QueryBudgetExceeded(f"query budget exceeded: {report.count} > {max_queries}\n{report.describe()}")
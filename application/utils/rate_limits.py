@@ -0,0 +1,114 @@
+# application/utils/rate_limits.py
+import math
+import threading
+import time
+from flask import current_app, request
+from limits.storage import Storage, storage_from_string
+
+## Rate limit counters shared by every worker, with the round trips batched.
+## "batched+redis://host:6379/0" (or "batched+memory://" as a local stand-in) wraps the storage after the "+": each worker
+## counts hits locally and adds them to the shared counter in one INCRBY every `flush_interval` seconds or `max_batch`
+## hits, whichever comes first. The counter a request is checked against is the shared value read at the last flush
+## plus the worker's unflushed hits, so a window can go over its limit by at most max_batch - 1 hits per worker.
+## Only the fixed-window strategy is supported (moving windows need every hit's timestamp in the shared storage).
+
+
+class WindowCounter:
+    __slots__ = ("shared", "pending", "expires_at", "synced_at")
+
+    def __init__(self, shared, expires_at, synced_at):
+        self.shared = shared          # shared counter at the last flush, including this worker's flushed hits
+        self.pending = 0              # hits counted here but not added to the shared counter yet
+        self.expires_at = expires_at  # end of the window (epoch seconds, as get_expiry() returns)
+        self.synced_at = synced_at
+
+
+class BatchedStorage(Storage):
+    STORAGE_SCHEME = ["batched+redis", "batched+rediss", "batched+redis+unix", "batched+memory"]
+    MAX_COUNTERS = 10000  # expired windows are dropped once this many keys are tracked
+
+    def __init__(self, uri, flush_interval=1.0, max_batch=10, storage=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions)
+        self.storage = storage or storage_from_string(uri.split("+", 1)[1], wrap_exceptions=wrap_exceptions, **options)
+        self.flush_interval = float(flush_interval)
+        self.max_batch = int(max_batch)
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_exceptions(self):
+        return self.storage.base_exceptions
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        with self.lock:
+            counter = self.counters.get(key)
+            if counter is not None and now < counter.expires_at:
+                counter.pending += amount
+                if counter.pending < self.max_batch and now - counter.synced_at < self.flush_interval:
+                    return counter.shared + counter.pending
+                amount, counter.pending, counter.synced_at = counter.pending, 0, now  # this request flushes the batch
+
+        shared = self.storage.incr(key, expiry, amount=amount)  # round trip outside the lock
+
+        if counter is not None and now < counter.expires_at:
+            with self.lock:
+                counter.shared = max(counter.shared, shared)  # concurrent flushes can return out of order
+                return counter.shared + counter.pending
+
+        expires_at = self.storage.get_expiry(key)  # first hit of the window in this worker
+        with self.lock:
+            if len(self.counters) >= self.MAX_COUNTERS:
+                self.counters = {k: c for k, c in self.counters.items() if c.expires_at > now}
+            self.counters[key] = WindowCounter(shared, expires_at, now)
+        return shared
+
+    def get(self, key):
+        counter = self.counters.get(key)
+        if counter is not None and time.time() < counter.expires_at:
+            return counter.shared + counter.pending
+        return self.storage.get(key)
+
+    def get_expiry(self, key):
+        counter = self.counters.get(key)
+        if counter is not None and time.time() < counter.expires_at:
+            return counter.expires_at
+        return self.storage.get_expiry(key)
+
+    def flush(self):
+        ### Adds every unflushed hit to the shared counters, e.g. before a worker exits ###
+        now = time.time()
+        with self.lock:
+            batches = [(key, counter.pending, counter.expires_at - now) for key, counter in self.counters.items()
+                       if counter.pending and counter.expires_at > now]
+            for counter in self.counters.values():
+                counter.pending = 0
+        for key, amount, remaining in batches:
+            self.storage.incr(key, max(1, math.ceil(remaining)), amount=amount)
+
+    def check(self):
+        return self.storage.check()
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+        return self.storage.reset()
+
+    def clear(self, key):
+        with self.lock:
+            self.counters.pop(key, None)
+        self.storage.clear(key)
+
+
+#================= Cost-weighted limits =================#
+
+def request_cost():
+    ### Budget a request takes from the default limits: RATELIMIT_COSTS[endpoint] (1 when not listed), times the ###
+    ### number of default sized pages asked for with ?per_page=, so a 100 row page costs 4 times a 25 row one.   ###
+    cost = current_app.config.get("RATELIMIT_COSTS", {}).get(request.endpoint, 1)
+    per_page = request.args.get("per_page", "")
+    if per_page.isdigit() and int(per_page) > 0:
+        default = current_app.config.get("PAGINATION_DEFAULT_PER_PAGE", 25)
+        pages = math.ceil(min(int(per_page), current_app.config.get("PAGINATION_MAX_PER_PAGE", 100)) / default)
+        cost *= max(pages, 1)
+    return cost
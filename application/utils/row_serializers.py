@@ -0,0 +1,212 @@
+# application/utils/row_serializers.py
+import threading
+from flask import request
+from marshmallow import fields
+from sqlalchemy import select
+from sqlalchemy.orm import RelationshipProperty
+from application.models import db
+from application.utils.metrics import serialization_timer
+
+## Read-only list endpoints select plain column rows with Core and turn each row into the dict schema.dump() builds for
+## the ORM object, through a function generated once per schema (one dict literal, one expression per field). No ORM
+## instances, identity map entries or per-row field introspection. The output is the same as the marshmallow dump:
+## same keys and values, so the JSON is byte for byte the same (tests/test_row_serializers.py checks every endpoint).
+##
+## Column fields of the common types are converted inline; other column fields call the field's own _serialize.
+## Nested many-to-one fields are LEFT OUTER JOINed into the same SELECT; nested collections are loaded with one extra
+## SELECT ... IN per page, like selectinload. Any other field (Method, Function, Pluck, ...) cannot be compiled.
+##
+## Endpoints serve RowSerializer.from_request(): ?fields= narrows the columns (and the SELECT), nested objects are only
+## included, joined and loaded when named in ?expand=.
+
+INLINE_CONVERSIONS = {  # exact field class -> conversion marshmallow's _serialize does for non-None values
+    fields.Integer: "int({})",
+    fields.Float: "float({})",
+    fields.String: "str({})",
+}
+
+
+def inline_conversion(field):
+    if type(field) is fields.Date and field.format in (None, "iso", "iso8601"):
+        return "{}.isoformat()"
+    if type(field) in INLINE_CONVERSIONS and not getattr(field, "as_string", False):
+        return INLINE_CONVERSIONS[type(field)]
+    return None
+
+
+class CompiledSchema:
+    ### The generated serialize(row, collections) function of one schema and the columns/joins it reads from ###
+
+    def __init__(self, schema, leading=()):
+        self.model = schema.opts.model
+        self.columns = list(leading)
+        self.joins = []
+        self.collections = []
+        self.namespace = {}
+        expression, self.key_index = self.expression(schema, self.model)
+        source = f"def serialize(row, collections):\n    return {expression}\n"
+        exec(compile(source, f"<row serializer {type(schema).__name__}>", "exec"), self.namespace)
+        self.source = source
+        self.serialize = self.namespace["serialize"]
+
+    def column(self, attribute):
+        self.columns.append(attribute)
+        return len(self.columns) - 1
+
+    def expression(self, schema, model):
+        ### Dict literal for one (possibly nested) schema and the row index of its primary key ###
+        primary_key = model.__mapper__.primary_key[0].key
+        key_index = None
+        items = []
+        collections = []  # (position in items, key, relationship, nested schema), added once the key index is known
+        for name, field in schema.dump_fields.items():
+            key = field.data_key or name
+            attribute = field.attribute or name
+            prop = model.__mapper__.attrs.get(attribute)
+
+            if isinstance(field, fields.Nested) and isinstance(prop, RelationshipProperty):
+                if prop.uselist:
+                    collections.append((len(items), key, getattr(model, attribute), field.schema))
+                    items.append(None)
+                else:
+                    self.joins.append(getattr(model, attribute))
+                    nested, nested_key = self.expression(field.schema, prop.mapper.class_)
+                    items.append(f"{key!r}: None if row[{nested_key}] is None else {nested}")
+                continue
+
+            if type(field) in (fields.Method, fields.Function, fields.Pluck) or prop is None or not hasattr(prop, "columns"):
+                raise TypeError(f"{type(schema).__name__}.{name} is not a column or nested relationship field")
+
+            index = self.column(getattr(model, attribute))
+            if attribute == primary_key:
+                key_index = index
+            value = f"row[{index}]"
+            conversion = inline_conversion(field)
+            if conversion is None:
+                self.namespace[f"serialize_{index}"] = field._serialize
+                items.append(f"{key!r}: serialize_{index}({value}, {key!r}, None)")
+            elif prop.columns[0].nullable:
+                items.append(f"{key!r}: None if {value} is None else {conversion.format(value)}")
+            else:
+                items.append(f"{key!r}: {conversion.format(value)}")
+
+        if key_index is None:  # the primary key is not dumped but identifies the row for joins and collections
+            key_index = self.column(getattr(model, primary_key))
+        for position, key, relationship, nested_schema in collections:
+            self.collections.append(CollectionLoader(relationship, getattr(model, primary_key), key_index, nested_schema))
+            items[position] = f"{key!r}: collections[{len(self.collections) - 1}].get(row[{key_index}], [])"
+        return "{" + ", ".join(items) + "}", key_index
+
+    def select(self, via=None):
+        query = select(*self.columns).select_from(via.class_ if via is not None else self.model)
+        if via is not None:
+            query = query.join(via)
+        for relationship in self.joins:
+            query = query.outerjoin(relationship)
+        return query
+
+    def dump(self, rows, session):
+        loaded = tuple(collection.load(rows, session) for collection in self.collections)
+        serialize = self.serialize
+        return [serialize(row, loaded) for row in rows]
+
+
+class CollectionLoader:
+    ### Loads a nested collection for a page of parent rows: parent key + nested columns, one SELECT ... IN ###
+
+    def __init__(self, relationship, parent_key, key_index, schema):
+        self.relationship = relationship
+        self.parent_key = parent_key
+        self.key_index = key_index
+        self.compiled = CompiledSchema(schema, leading=(parent_key,))
+
+    def load(self, rows, session):
+        keys = list(dict.fromkeys(row[self.key_index] for row in rows))
+        if not keys:
+            return {}
+        query = self.compiled.select(via=self.relationship).where(self.parent_key.in_(keys))
+        nested_rows = session.execute(query).all()
+        grouped = {}
+        for row, item in zip(nested_rows, self.compiled.dump(nested_rows, session)):
+            grouped.setdefault(row[0], []).append(item)
+        return grouped
+
+
+MAX_FIELDSETS = 64  # compiled ?fields=/?expand= variants kept per serializer, oldest dropped first
+
+
+def split_names(value): # "id, VIN,,id" -> ("VIN", "id"): sorted and deduplicated so equal requests share a variant
+    return tuple(sorted({name.strip() for name in (value or "").split(",") if name.strip()}))
+
+
+class RowSerializer:
+    ### schema.dump() for Core rows. Compiled on first use, so Nested("OtherSchema") names resolve after import ###
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._compiled = None
+        self.fieldsets = {}
+        self.lock = threading.Lock()
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            self._compiled = CompiledSchema(self.schema)
+        return self._compiled
+
+    def fieldset(self, only=None, expand=()):
+        ### Serializer for part of the schema: `only` field names ("customer.name" for nested ones, the primary key is ###
+        ### always kept for cursors) and the nested fields in `expand`. Nested fields that are not expanded are left  ###
+        ### out, so their JOIN or SELECT ... IN is never run. Unknown or unexpanded names raise ValueError.           ###
+        key = (only, expand)
+        serializer = self.fieldsets.get(key)
+        if serializer is not None:
+            return serializer
+        self.check_fieldset(only, expand)
+        nested = [name for name, field in self.schema.dump_fields.items() if isinstance(field, fields.Nested)]
+        exclude = set(self.schema.exclude) | {name for name in nested if name not in expand}
+        if only is not None:
+            only = set(only) | set(expand) | {self.schema.opts.model.__mapper__.primary_key[0].key}
+        with self.lock:  # request threads share the serializer: check, evict and insert together
+            serializer = self.fieldsets.get(key)
+            if serializer is None:
+                serializer = RowSerializer(type(self.schema)(many=self.schema.many, only=only, exclude=exclude))
+                if len(self.fieldsets) >= MAX_FIELDSETS:
+                    self.fieldsets.pop(next(iter(self.fieldsets)))
+                self.fieldsets[key] = serializer
+        return serializer
+
+    def check_fieldset(self, only, expand):
+        declared = self.schema.dump_fields
+        expandable = sorted(name for name, field in declared.items() if isinstance(field, fields.Nested))
+        for name in expand:
+            if name not in expandable:
+                raise ValueError(f"cannot expand '{name}', expandable fields: {', '.join(expandable) or 'none'}")
+        for name in only or ():
+            parent, _, child = name.partition(".")
+            if parent not in declared or (child and (parent not in expandable or child not in declared[parent].schema.dump_fields)):
+                raise ValueError(f"unknown field '{name}'")
+            if parent in expandable and parent not in expand:
+                raise ValueError(f"field '{name}' needs expand={parent}")
+
+    def from_request(self):
+        ### fieldset() for ?fields=id,VIN,customer.name&expand=customer; ValueError for names the schema does not dump ###
+        fields_arg = request.args.get("fields")
+        return self.fieldset(split_names(fields_arg) if fields_arg is not None else None, split_names(request.args.get("expand")))
+
+    def select(self):
+        ### SELECT of the columns the serializer reads; add where/order_by/limit like any select() ###
+        return self.compiled.select()
+
+    def dump(self, rows, session=None):
+        with serialization_timer():
+            return self.compiled.dump(rows, session or db.session)
+
+    def all(self, query, session=None):
+        session = session or db.session
+        return self.dump(session.execute(query).all(), session)
+
+    def first(self, query, session=None): # dict of the first row, or None
+        session = session or db.session
+        row = session.execute(query).first()
+        return self.dump([row], session)[0] if row is not None else None
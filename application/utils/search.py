@@ -0,0 +1,313 @@
+# application/utils/search.py
+import bisect
+import heapq
+import itertools
+import threading
+from flask import current_app
+from sqlalchemy import select
+from application.models import Mechanics, db
+from application.utils.cache_tags import tag_versions
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def trigrams(text): # "  name " padded like pg_trgm, so word starts get their own trigrams
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    ### In-process name index used for ranked prefix/substring/fuzzy search.                                      ###
+    ### Prefix matches come from sorted (key, id) lists with bisect, so the common autocomplete case only         ###
+    ### touches `limit` entries; substring (trigram postings) and fuzzy matches only run to fill up the rest.     ###
+    ### Fuzzy matching is per word: every query word must be within one edit (typo, missing/extra letter or two  ###
+    ### swapped letters) of a word of the name. Words are found through their one-letter deletions, like SymSpell. ###
+
+    def __init__(self, max_candidates=1000):
+        self.max_candidates = max_candidates  # ids a substring/fuzzy lookup ranks at most, bounds the cost of common terms
+        self.names = {}       # id -> normalized name
+        self.grams = {}       # id -> set of trigrams of the name
+        self.postings = {}    # trigram -> set of ids
+        self.words = {}       # word -> set of ids whose name contains it
+        self.deletions = {}   # word with one letter removed -> set of words
+        self.by_name = []     # sorted (name, id)
+        self.by_word = []     # sorted (name from the start of its 2nd, 3rd.. word, id)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, items, **kwargs): # bulk load (id, name) pairs, sorting the prefix lists once instead of insort per item
+        index = cls(**kwargs)
+        for item_id, name in items:
+            name = normalize(name)
+            index._add_terms(item_id, name)
+            index.by_name.append((name, item_id))
+            index.by_word.extend((word_key, item_id) for word_key in word_keys(name))
+        index.by_name.sort()
+        index.by_word.sort()
+        return index
+
+    def add(self, item_id, name):
+        with self.lock:
+            self._remove(item_id)
+            name = normalize(name)
+            self._add_terms(item_id, name)
+            bisect.insort(self.by_name, (name, item_id))
+            for word_key in word_keys(name):
+                bisect.insort(self.by_word, (word_key, item_id))
+
+    def remove(self, item_id):
+        with self.lock:
+            self._remove(item_id)
+
+    def _add_terms(self, item_id, name):
+        grams = trigrams(name)
+        self.names[item_id] = name
+        self.grams[item_id] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(item_id)
+        for word in set(name.split()):
+            if word not in self.words:
+                self.words[word] = set()
+                for deletion in deletions(word):
+                    self.deletions.setdefault(deletion, set()).add(word)
+            self.words[word].add(item_id)
+
+    def _remove(self, item_id):
+        name = self.names.pop(item_id, None)
+        if name is None:
+            return
+        for gram in self.grams.pop(item_id):
+            ids = self.postings[gram]
+            ids.discard(item_id)
+            if not ids:
+                del self.postings[gram]
+        for word in set(name.split()):
+            ids = self.words[word]
+            ids.discard(item_id)
+            if not ids:
+                del self.words[word]
+                for deletion in deletions(word):
+                    words = self.deletions[deletion]
+                    words.discard(word)
+                    if not words:
+                        del self.deletions[deletion]
+        sorted_remove(self.by_name, (name, item_id))
+        for word_key in word_keys(name):
+            sorted_remove(self.by_word, (word_key, item_id))
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=10):
+        ### Returns up to `limit` ids ranked: name prefix (exact first), word prefix, substring, then fuzzy ###
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        with self.lock:
+            results = []
+            seen = set()
+            for entries in (self.by_name, self.by_word):
+                for item_id in prefix_matches(entries, query):
+                    if item_id not in seen:
+                        seen.add(item_id)
+                        results.append(item_id)
+                        if len(results) == limit:
+                            return results
+
+            substring = heapq.nsmallest(limit - len(results),
+                                        ((self.names[item_id], item_id) for item_id in self._substring_candidates(query)
+                                         if item_id not in seen and query in self.names[item_id]))
+            for _, item_id in substring:
+                seen.add(item_id)
+                results.append(item_id)
+
+            if len(results) < limit:
+                fuzzy = heapq.nsmallest(limit - len(results),
+                                        ((distance, self.names[item_id], item_id)
+                                         for item_id, distance in self._fuzzy_candidates(query).items() if item_id not in seen))
+                results.extend(item_id for _, _, item_id in fuzzy)
+
+        return results
+
+    def _substring_candidates(self, query):
+        if len(query) < 3: # 1-2 chars only match as a prefix, anywhere inside a name would be most of the index
+            return set()
+
+        inner = sorted((self.postings.get(query[i:i + 3], set()) for i in range(len(query) - 2)), key=len)
+        if not inner[0]:
+            return set()
+        ids = set(inner[0])
+        for gram_ids in inner[1:]: # intersect smallest posting lists first
+            ids &= gram_ids
+            if not ids:
+                break
+        return set(itertools.islice(ids, self.max_candidates))
+
+    def _fuzzy_candidates(self, query):
+        ### {id: total edits} for names where every query word is within one edit of one of their words ###
+        candidates = None
+        for term in query.split():
+            matches = {}  # id -> edits for this query word, closest words first so the cap keeps them
+            for distance, word in sorted(self._similar_words(term)):
+                for item_id in self.words[word]:
+                    if item_id not in matches and (candidates is None or item_id in candidates):
+                        matches[item_id] = distance
+                if len(matches) >= self.max_candidates:
+                    break
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates = {item_id: candidates[item_id] + distance for item_id, distance in matches.items()}
+            if not candidates:
+                break
+        return candidates or {}
+
+    def _similar_words(self, term):
+        if len(term) < FUZZY_MIN_LENGTH:
+            return [(0, term)] if term in self.words else []
+        # a word one edit away shares a one-letter deletion with the term, or one of them is the other's deletion
+        variants = deletions(term) | {term}
+        words = {variant for variant in variants if variant in self.words}
+        for variant in variants:
+            words |= self.deletions.get(variant, set())
+        return [(distance, word) for word in words if (distance := edit_distance(term, word)) <= 1]
+
+
+FUZZY_MIN_LENGTH = 4  # shorter query words must match exactly, one edit away from "ali" is half the index
+
+
+def deletions(word):
+    if len(word) < FUZZY_MIN_LENGTH:
+        return set()
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance(a, b): # Damerau-Levenshtein (optimal string alignment): a swap of two neighbouring letters is one edit
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[len(b)]
+
+
+def word_keys(name): # the name starting at each word after the first one, "peter meen" -> ["meen"]
+    return [name[i + 1:] for i, char in enumerate(name) if char == " "]
+
+
+def prefix_matches(entries, prefix):
+    for position in range(bisect.bisect_left(entries, (prefix,)), len(entries)):
+        key, item_id = entries[position]
+        if not key.startswith(prefix):
+            break
+        yield item_id
+
+
+def sorted_remove(entries, entry):
+    position = bisect.bisect_left(entries, entry)
+    if position < len(entries) and entries[position] == entry:
+        del entries[position]
+
+
+class LiveIndex:
+    ### Holds an app's current TrigramIndex and rebuilds it when the data version (a cache tag version) changes.     ###
+    ### Only the first build runs in a request; later rebuilds run in one background thread at a time while searches ###
+    ### keep using the old index, and the new index is swapped in atomically. Writes applied while a rebuild runs are ###
+    ### recorded and replayed onto the new index before the swap, so they are not lost. A write this worker applied   ###
+    ### itself hands over the version it bumped to, so it does not trigger a rebuild of its own.                      ###
+
+    def __init__(self, app, load):
+        self.app = app
+        self.load = load          # () -> (id, name) rows, called inside an app context
+        self.index = None
+        self.version = None       # data version the current index was built from
+        self.building = None      # version being built in the background, None when idle
+        self.pending = []         # (method name, args) applied to the current index during the build
+        self.thread = None
+        self.lock = threading.Lock()
+        self.first_build = threading.Lock()
+
+    def get(self, version):
+        if self.index is None:
+            with self.first_build:  # concurrent first searches wait for one build instead of each running their own
+                if self.index is None:
+                    with self.lock:
+                        self.building, self.pending = version, []
+                    self._build()
+        with self.lock:
+            if version != self.version and self.building is None:
+                self.building, self.pending = version, []
+                self.thread = threading.Thread(target=self._rebuild, name="search-index-rebuild", daemon=True)
+                self.thread.start()
+            return self.index
+
+    def _rebuild(self):
+        with self.app.app_context():  # own scoped session, removed when the context ends
+            try:
+                self._build()
+            except Exception:
+                self.app.logger.exception("search index rebuild failed, keeping the old index")
+
+    def _build(self):
+        try:
+            index = TrigramIndex.build(self.load())
+            with self.lock:
+                for method, args in self.pending:  # writes committed while the rows were loaded
+                    getattr(index, method)(*args)
+                self.index, self.version = index, self.building
+        finally:
+            with self.lock:
+                self.building, self.pending = None, []
+
+    def add(self, item_id, name, change=None):
+        self._apply(change, "add", item_id, name)
+
+    def remove(self, item_id, change=None):
+        self._apply(change, "remove", item_id)
+
+    def _apply(self, change, method, *args):
+        ### `change` is the (previous, new) data version of the write; an index that was at `previous` only ###
+        ### lacked this write, so after applying it the index is at `new`                                   ###
+        with self.lock:
+            if self.index is not None:
+                getattr(self.index, method)(*args)
+            if self.building is not None:
+                self.pending.append((method, args))
+            if change is not None:
+                previous, version = change
+                if self.index is not None and self.version == previous:
+                    self.version = version
+                if self.building == previous:  # the running build replays this write before its swap
+                    self.building = version
+
+
+def load_mechanic_names():
+    return db.session.execute(select(Mechanics.id, Mechanics.name)).all()
+
+
+def get_live_index():
+    live = current_app.extensions.get("mechanic_search_index")
+    if live is None:
+        live = current_app.extensions.setdefault("mechanic_search_index",
+                                                 LiveIndex(current_app._get_current_object(), load_mechanic_names))
+    return live
+
+
+def get_mechanic_index():
+    ### Per-app mechanic name index, built from (id, name) columns on first use. Writes in this worker update it ###
+    ### incrementally; writes in any worker bump the "mechanics" cache tag, which triggers a background rebuild.  ###
+    return get_live_index().get(tag_versions("mechanics")["mechanics"])
+
+
+def index_mechanic(mechanic, changes=None): # call after a mechanic is created/updated and committed, with invalidate()'s result
+    get_live_index().add(mechanic.id, mechanic.name, (changes or {}).get("mechanics"))
+
+
+def unindex_mechanic(mechanic_id, changes=None): # call after a mechanic is deleted and committed, with invalidate()'s result
+    get_live_index().remove(mechanic_id, (changes or {}).get("mechanics"))
@@ -1,18 +1,27 @@
 # application/utils/util.py
 import jwt
+import base64
+import json
+import threading
+import time
+import uuid
 from datetime import datetime, timezone, timedelta
 from functools import wraps
-from flask import request,jsonify
-from application.models import Customer
+from flask import request,jsonify,current_app,g
 from application.models import db
+from application.extensions import cache
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 SECRET_KEY = "my super secret, secret key"
+TOKEN_LIFETIME = timedelta(days=0 , hours= 1)
 
 def encode_token(customer_id): #using unique pieces of info to make our tokens user specific
     payload = {
-        "exp" : datetime.now(timezone.utc) + timedelta(days=0 , hours= 1),  #Setting the expiration time to an hour past now
+        "exp" : datetime.now(timezone.utc) + TOKEN_LIFETIME,  #Setting the expiration time to an hour past now
         "iat" : datetime.now(timezone.utc),  #Issued at
-        "sub" : str(customer_id) #This needs to be a string or the token will be malformed and won't be able to be decoded.
+        "sub" : str(customer_id), #This needs to be a string or the token will be malformed and won't be able to be decoded.
+        "jti" : uuid.uuid4().hex  # token id, lets a single token be revoked
                 }
     
     token = jwt.encode(payload , SECRET_KEY , algorithm = 'HS256')
@@ -20,33 +29,105 @@ def encode_token(customer_id): #using unique pieces of info to make our tokens u
     return token
 
 
+#================= Token revocation list =================#
+
+class RevocationList:
+    ### Revoked customers/tokens, checked by token_required instead of loading the customer on every request.       ###
+    ### An entry rejects the tokens issued at or before the time it was revoked (iat, whole seconds), so a customer  ###
+    ### id the database hands out again after a delete gets working tokens. Entries only need to live as long as a   ###
+    ### token (TOKEN_LIFETIME). They are kept in a local dict and shared with the other workers through the cache     ###
+    ### backend under one key, which is re-read at most every sync_interval.                                         ###
+    ### Two workers revoking at the same instant can overwrite each other's shared entry; each still revokes locally. ###
+    ### The shared key lives in the cache, which may evict it (SimpleCache past its threshold, redis under maxmemory  ###
+    ### with a volatile-* policy): workers that already synced keep their entries, a worker started after the        ###
+    ### eviction does not see the earlier revocations. Give the cache redis a noeviction policy where that matters.   ###
+    CACHE_KEY = "auth:revocations"
+
+    def __init__(self, sync_interval=5):
+        self.sync_interval = sync_interval
+        self.entries = {}     # "customer:<id>" / "token:<jti>" -> (unix time revoked, unix time the entry expires)
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+
+    def revoke(self, key, lifetime=TOKEN_LIFETIME):
+        now = time.time()
+        entry = (now, now + lifetime.total_seconds())
+        with self.lock:
+            self.entries = self._merge(self.entries, {key: entry})
+        shared = self._merge(cache.get(self.CACHE_KEY) or {}, {key: entry})
+        cache.set(self.CACHE_KEY, shared, timeout=int(TOKEN_LIFETIME.total_seconds()))
+
+    def is_revoked(self, issued_at, *keys):
+        now = time.time()
+        if now - self.synced_at > self.sync_interval:
+            self._sync(now)
+        entries = self.entries
+        for key in keys:
+            revoked_at, expires_at = entries.get(key, (0, 0))
+            if expires_at > now and issued_at <= revoked_at:
+                return True
+        return False
+
+    def _sync(self, now):
+        shared = cache.get(self.CACHE_KEY) or {}
+        with self.lock:
+            self.entries = self._merge(self.entries, shared)
+            self.synced_at = now
+
+    @staticmethod
+    def _merge(entries, other): # unexpired entries of both, the later revocation wins
+        now = time.time()
+        merged = {key: entry for key, entry in entries.items() if entry[1] > now}
+        for key, entry in other.items():
+            if entry[1] > now and entry[0] >= merged.get(key, (0, 0))[0]:
+                merged[key] = entry
+        return merged
+
+
+def get_revocation_list(): # one per app, like the cache it syncs through
+    revocations = current_app.extensions.get("auth_revocations")
+    if revocations is None:
+        revocations = RevocationList(current_app.config.get("AUTH_REVOCATION_SYNC_SECONDS", 5))
+        current_app.extensions["auth_revocations"] = revocations
+    return revocations
+
+
+def revoke_customer_tokens(customer_id): # e.g. after the customer is deleted
+    get_revocation_list().revoke(f"customer:{customer_id}")
+
+
+def revoke_token(claims): # a single token, only for the time it has left
+    remaining = datetime.fromtimestamp(claims["exp"], timezone.utc) - datetime.now(timezone.utc)
+    if claims.get("jti") and remaining.total_seconds() > 0:
+        get_revocation_list().revoke(f"token:{claims['jti']}", remaining)
+
+
+## Auth trusts the signed claims for the token lifetime: no db lookup and no stdout logging per request,
+## deleted customers and revoked tokens are rejected through the revocation list.
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         token =None
          # Look for the token in the Authorization header
         if 'Authorization' in request.headers:
-            print(request.headers)
-            token = request.headers['Authorization'].split(" ")[1]
-            print(token)
+            parts = request.headers['Authorization'].split(" ")
+            token = parts[1] if len(parts) == 2 else None
             if not token:
                 return jsonify({"message": "Token is missing and Invalid Authorization header format!!."}), 400
             
             try:
                     # Decode the token
                 data =jwt.decode(token , SECRET_KEY ,  algorithms = ['HS256'])
-                print(data)
-                print(f"Token to decode: '{token}'")
                 customer_id = data['sub'] # Fetch the customer ID
-                customer= db.session.get(Customer,customer_id)
-
-                if not customer:
-                    return jsonify({"message":"Invalid token — customer does not exist."}), 401
             except jwt.ExpiredSignatureError as e:
                 return jsonify({'message': 'Token has expired!'}), 401
-            except jwt.InvalidTokenError:
+            except (jwt.InvalidTokenError, KeyError):
                 return jsonify({'message': 'Invalid token!'}), 401
-            
+
+            if get_revocation_list().is_revoked(data.get('iat', 0), f"customer:{customer_id}", f"token:{data.get('jti')}"):
+                return jsonify({'message': 'Token has been revoked!'}), 401
+
+            g.token_claims = data
             return f(customer_id, *args, **kwargs)
         
         else:
@@ -54,3 +135,53 @@ def token_required(f):
     
     return decorated
 
+
+#================= Keyset (cursor) pagination helpers =================#
+
+MAX_CURSOR_ID = 2**63 - 1
+
+def encode_cursor(last_id): # opaque token for the next page, clients must pass it back unchanged
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor): # returns the last seen id, 0 when no cursor is given (first page)
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if type(last_id) is not int or not 0 <= last_id <= MAX_CURSOR_ID:  # bool is an int subclass, ids are BIGINT at most
+        raise ValueError("Invalid cursor.")
+    return last_id
+
+
+def get_page_size(): # reads ?per_page= and clamps it to the server side maximum
+    default = current_app.config.get("PAGINATION_DEFAULT_PER_PAGE", 25)
+    maximum = current_app.config.get("PAGINATION_MAX_PER_PAGE", 100)
+    per_page = request.args.get("per_page")
+    if per_page is None or per_page == "":
+        return min(default, maximum)
+    try:
+        per_page = int(per_page)
+    except ValueError:
+        raise ValueError("per_page must be an integer.")
+    if per_page <= 0:
+        raise ValueError("per_page must be a positive integer.")
+    return min(per_page, maximum)
+
+
+#================= Backend-native upsert =================#
+
+def upsert_statement(table, index_elements, update): # INSERT .. ON DUPLICATE KEY UPDATE (mysql) or ON CONFLICT DO UPDATE (sqlite)
+    ## `update(incoming)` returns the columns to set on conflict, `incoming` gives access to the values of the row being inserted
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        statement = mysql_insert(table)
+        return statement.on_duplicate_key_update(update(statement.inserted))
+
+    statement = sqlite_insert(table)
+    return statement.on_conflict_do_update(index_elements=index_elements, set_=update(statement.excluded))
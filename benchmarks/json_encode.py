@@ -0,0 +1,61 @@
+### JSON encode throughput: stdlib provider vs orjson provider ###
+##
+## Encodes what GET /service-tickets/ returns (service_tickets_schema dumps of tickets with their customer and
+## mechanics) through Flask's DefaultJSONProvider and ORJSONProvider, the two JSON_PROVIDER choices. The schema
+## dump is done once up front, so only the encode step (jsonify) is timed.
+##
+## Run from the project root:  python -m benchmarks.json_encode --tickets 100 --seconds 3
+
+import argparse
+import time
+from datetime import date, timedelta
+from flask.json.provider import DefaultJSONProvider
+from application import create_app
+from application.models import Customer, Mechanics, Service_tickets
+from application.utils.json_provider import ORJSONProvider
+
+
+def build_payload(app, tickets):
+    mechanics = [Mechanics(id=i, name=f"mechanic {i}", address=f"{i} Garage Road", email=f"mechanic{i}@email.com",
+                           phone="555-0100") for i in range(1, 6)]
+    customers = [Customer(id=i, name=f"customer {i}", email=f"customer{i}@email.com", password="not dumped",
+                          address=f"{i} Main Street", phone="555-0199", salary=52000.0 + i) for i in range(1, 21)]
+    rows = [Service_tickets(id=i, VIN=f"1HGCM82633A{i:06d}", service_date=date(2025, 1, 1) + timedelta(days=i % 365),
+                            customer_issue="Brakes squeal when stopping, check pads and rotors",
+                            customer_id=customers[i % 20].id, customer=customers[i % 20],
+                            mechanics=[mechanics[i % 5], mechanics[(i + 1) % 5], mechanics[(i + 2) % 5]])
+            for i in range(1, tickets + 1)]
+    with app.app_context():
+        from application.blueprints.service_tickets.schemas import service_tickets_schema
+        return service_tickets_schema.dump(rows)
+
+
+def measure(provider, payload, seconds):
+    size = len(provider.dumps(payload).encode())
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        provider.dumps(payload)
+        count += 1
+    elapsed = time.perf_counter() - started
+    return count / elapsed, count * size / elapsed / 1e6, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON encode throughput of the app.json providers")
+    parser.add_argument("--tickets", type=int, default=100, help="tickets per payload (one list page)")
+    parser.add_argument("--seconds", type=float, default=3.0, help="time spent per provider")
+    args = parser.parse_args()
+
+    app = create_app("TestingConfig")
+    payload = build_payload(app, args.tickets)
+    print(f"{args.tickets} tickets per payload, {args.seconds:.1f}s per provider")
+    baseline = None
+    for name, provider in (("stdlib", DefaultJSONProvider(app)), ("orjson", ORJSONProvider(app))):
+        per_second, megabytes, size = measure(provider, payload, args.seconds)
+        baseline = baseline or per_second
+        print(f"  {name:8} {per_second:10.1f} payloads/s {megabytes:8.1f} MB/s  {size} bytes  x{per_second / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+### List serialization: ORM objects + marshmallow vs Core rows + compiled row serializer ###
+##
+## Loads and serializes a page of service tickets (nested customer and mechanics, as GET /service-tickets/ returns it)
+## or of inventories from an in-memory SQLite database, both ways: the ORM query the endpoint used to run followed by
+## service_tickets_schema.dump(), and service_tickets_rows (Core SELECT + generated serializer). Reports pages/s and
+## the peak memory allocated per page (tracemalloc), and checks both produce the same data.
+##
+## Run from the project root:  python -m benchmarks.list_serialization --rows 500 --seconds 3
+
+import argparse
+import time
+import tracemalloc
+from datetime import date, timedelta
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.pool import StaticPool
+from application.models import Base, Customer, Inventory, Mechanics, Service_tickets, mechanic_services
+from application.blueprints.inventories.schemas import inventories_rows, inventories_schema
+from application.blueprints.service_tickets.schemas import service_tickets_rows, service_tickets_schema
+
+
+def build_database(rows):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [{"name": f"customer {i}", "email": f"customer{i}@email.com", "password": "x",
+                                         "address": f"{i} Main Street", "phone": "555-0199", "salary": 52000.0 + i}
+                                        for i in range(1, 51)])
+        conn.execute(insert(Mechanics), [{"name": f"mechanic {i}", "email": f"mechanic{i}@email.com",
+                                          "address": f"{i} Garage Road", "phone": "555-0100"} for i in range(1, 11)])
+        conn.execute(insert(Service_tickets), [{"VIN": f"1HGCM82633A{i:06d}", "customer_issue": "Brakes squeal when stopping",
+                                                "service_date": date(2025, 1, 1) + timedelta(days=i % 365),
+                                                "customer_id": i % 50 + 1} for i in range(1, rows + 1)])
+        conn.execute(insert(mechanic_services), [{"service_id": i, "mechanic_id": (i + k) % 10 + 1}
+                                                 for i in range(1, rows + 1) for k in range(3)])
+        conn.execute(insert(Inventory), [{"name": f"Part {i}", "price": 9.99 + i, "sku": f"P-{i}"} for i in range(rows)])
+    return engine
+
+
+def orm_page(session, model):
+    if model is Service_tickets:
+        query = select(Service_tickets).options(joinedload(Service_tickets.customer), selectinload(Service_tickets.mechanics))
+        result = service_tickets_schema.dump(session.execute(query).scalars().all())
+    else:
+        result = inventories_schema.dump(session.execute(select(Inventory)).scalars().all())
+    session.expunge_all()  # a new request starts with an empty identity map
+    return result
+
+
+def rows_page(session, model):
+    serializer = service_tickets_rows if model is Service_tickets else inventories_rows
+    return serializer.all(serializer.select(), session)
+
+
+def measure(page, session, model, seconds):
+    tracemalloc.start()
+    page(session, model)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        page(session, model)
+        count += 1
+    return count / (time.perf_counter() - started), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM + marshmallow vs compiled row serializers")
+    parser.add_argument("--rows", type=int, default=500, help="rows per page")
+    parser.add_argument("--seconds", type=float, default=3.0, help="time spent per variant")
+    args = parser.parse_args()
+
+    engine = build_database(args.rows)
+    with Session(engine) as session:
+        for model in (Service_tickets, Inventory):
+            assert orm_page(session, model) == rows_page(session, model)
+            print(f"{model.__tablename__}, {args.rows} rows per page")
+            baseline = None
+            for name, page in (("orm+marshmallow", orm_page), ("row serializer", rows_page)):
+                per_second, peak = measure(page, session, model, args.seconds)
+                baseline = baseline or per_second
+                print(f"  {name:16} {per_second:8.1f} pages/s  {peak / args.rows / 1024:6.2f} KiB/row peak  x{per_second / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
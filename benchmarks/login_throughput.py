@@ -0,0 +1,80 @@
+### Logins per second at a given password hash cost ###
+##
+## Simulates the login hot path: the id/name/password lookup by email against an in-memory SQLite database
+## and the hash check through PasswordHasher (the bounded pool used by POST /customers/login), from
+## --clients concurrent threads standing in for WSGI worker threads.
+##
+## Run from the project root:  python -m benchmarks.login_throughput --method scrypt:32768:8:1 --workers 4 --clients 16
+
+import argparse
+import threading
+import time
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.pool import StaticPool
+from werkzeug.security import generate_password_hash
+from application.models import Base, Customer
+from application.utils.passwords import PasswordHasher, PasswordPoolBusy
+
+
+def build_database(method, customers):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    password_hash = generate_password_hash("secret", method)  # same hash for every row, setup time is not measured
+    with engine.begin() as conn:
+        conn.execute(insert(Customer), [{"name": f"customer {i}", "email": f"customer{i}@email.com", "password": password_hash,
+                                         "address": "street", "phone": "000", "salary": 1.0} for i in range(customers)])
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput at a given hash cost")
+    parser.add_argument("--method", default="scrypt:32768:8:1", help="werkzeug hash method, e.g. pbkdf2:sha256:600000")
+    parser.add_argument("--workers", type=int, default=4, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--max-pending", type=int, default=32, help="PASSWORD_HASH_MAX_PENDING")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent login threads")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--customers", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine = build_database(args.method, args.customers)
+    hasher = PasswordHasher(args.method, workers=args.workers, max_pending=args.max_pending, wait=2.0)
+    lock = threading.Lock()
+    totals = {"ok": 0, "busy": 0, "latency": 0.0}
+    deadline = time.perf_counter() + args.seconds
+
+    def client(number):
+        i = number
+        with engine.connect() as conn:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                email = f"customer{i % args.customers}@email.com"
+                row = conn.execute(select(Customer.id, Customer.name, Customer.password).where(Customer.email == email)).first()
+                try:
+                    matches, _ = hasher.verify(row.password, "secret")
+                    assert matches
+                    key = "ok"
+                except PasswordPoolBusy:
+                    key = "busy"
+                with lock:
+                    totals[key] += 1
+                    totals["latency"] += time.perf_counter() - started
+                i += args.clients
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    attempts = totals["ok"] + totals["busy"]
+    print(f"method {args.method}, {args.workers} hash workers, {args.clients} clients, {elapsed:.1f}s")
+    print(f"  logins/s       {totals['ok'] / elapsed:10.1f}")
+    print(f"  rejected (503) {totals['busy']:10d}")
+    print(f"  mean latency   {totals['latency'] / max(attempts, 1) * 1000:10.1f} ms")
+    hasher.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
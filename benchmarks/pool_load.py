@@ -0,0 +1,93 @@
+### Connection pool load test: is the pool sized right for the worker/thread count? ###
+##
+## Simulates one gunicorn worker: --threads request threads (WEB_THREADS) each check out a connection, run a query,
+## hold it for --hold-ms (the rest of the request's database work) and return it. Runs once per pool size in
+## --pool-sizes with the other engine options taken from ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS (so DB_MAX_OVERFLOW,
+## DB_POOL_TIMEOUT, ... apply), measuring checkout wait through the same PoolMetrics that /metrics serves.
+## Also checks that --workers processes stay under the server's max_connections.
+##
+## Run from the project root:  python -m benchmarks.pool_load --workers 4 --threads 8 --pool-sizes 2,4,8
+##                             python -m benchmarks.pool_load --database-url mysql+mysqlconnector://user:pw@host/db
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, exc, text
+from config import ProductionConfig
+from application.utils.metrics import PoolMetrics
+
+
+def run(url, options, threads, hold, seconds):
+    engine = create_engine(url, **options)
+    metrics = PoolMetrics("default", engine)
+    waits = []
+    peak = [0.0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def request_thread():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    waited = time.perf_counter() - started
+                    conn.execute(text("SELECT 1"))
+                    saturation = dict(metrics.gauges()).get("db_pool_saturation", 0.0)
+                    time.sleep(hold)
+            except exc.TimeoutError:
+                continue
+            with lock:
+                waits.append(waited)
+                peak[0] = max(peak[0], saturation)
+
+    workers = [threading.Thread(target=request_thread) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return len(waits) / elapsed, waits, metrics.timeouts, peak[0]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection pool sizing load test")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 4)), help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", 4)), help="threads per worker")
+    parser.add_argument("--pool-sizes", default=None, help="comma separated pool_size values to compare")
+    parser.add_argument("--hold-ms", type=float, default=20.0, help="time a request keeps its connection")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration per pool size")
+    parser.add_argument("--max-connections", type=int, default=151, help="MySQL max_connections")
+    args = parser.parse_args()
+
+    options = dict(ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS)
+    sizes = [int(size) for size in args.pool_sizes.split(",")] if args.pool_sizes else [options["pool_size"]]
+    url = args.database_url
+    if url is None:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "pool_load.db")
+        options.pop("pool_recycle", None)
+
+    print(f"{args.threads} threads per worker, {args.hold_ms:.0f} ms per checkout, max_overflow {options['max_overflow']}, "
+          f"pool_timeout {options['pool_timeout']}s")
+    print(f"  {'pool_size':>9} {'req/s':>9} {'wait p50':>9} {'wait p99':>9} {'max wait':>9} {'timeouts':>8} {'peak sat':>8}  connections")
+    for size in sizes:
+        per_second, waits, timeouts, peak = run(url, {**options, "pool_size": size}, args.threads, args.hold_ms / 1000, args.seconds)
+        total = args.workers * (size + options["max_overflow"])
+        budget = "ok" if total <= args.max_connections else f"OVER max_connections {args.max_connections}"
+        print(f"  {size:9d} {per_second:9.1f} {percentile(waits, 0.5) * 1000:7.2f}ms {percentile(waits, 0.99) * 1000:7.2f}ms "
+              f"{max(waits, default=0) * 1000:7.2f}ms {timeouts:8d} {peak:8.2f}  {args.workers} x {size + options['max_overflow']} = {total} ({budget})")
+    print(f"pool_size >= threads ({args.threads}) means no request waits for a connection; the p99 wait and peak "
+          f"saturation show how far below that a pool can go before requests queue.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+### Before/after query plans and timings for the hot lookups covered by the indexes in application/models.py ###
+##
+## Builds two in-memory SQLite databases with the same data: "before" (mechanic_services without a key,
+## no service_tickets indexes, the original schema) and "after" (the current models), then prints
+## EXPLAIN QUERY PLAN and the mean time of each query on both.
+##
+## Run from the project root:  python -m benchmarks.query_plans --tickets 100000
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, select, func, insert, text
+from application.models import Base, Customer, Mechanics, Service_tickets, mechanic_services
+
+BEFORE_SCHEMA = [
+    "DROP INDEX ix_service_tickets_customer_date",
+    "DROP INDEX ix_service_tickets_vin",
+    "DROP TABLE mechanic_services",
+    "CREATE TABLE mechanic_services (mechanic_id INTEGER REFERENCES mechanics (id), "
+    "service_id INTEGER REFERENCES service_tickets (id))",
+]
+
+
+def build_database(indexed, tickets, customers, mechanics, seed=7):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    random.seed(seed)
+
+    with engine.begin() as conn:
+        if not indexed:
+            for statement in BEFORE_SCHEMA:
+                conn.execute(text(statement))
+
+        conn.execute(insert(Customer), [{"name": f"customer {i}", "email": f"customer{i}@email.com", "password": "x",
+                                         "address": "street", "phone": "000", "salary": 1.0} for i in range(customers)])
+        conn.execute(insert(Mechanics), [{"name": f"mechanic {i}", "email": f"mechanic{i}@email.com",
+                                          "address": "street", "phone": "000"} for i in range(mechanics)])
+        conn.execute(insert(Service_tickets), [{"VIN": f"VIN{i:014d}", "customer_issue": "Oil Change",
+                                                "customer_id": random.randint(1, customers),
+                                                "service_date": date(2024, 1, 1) + timedelta(days=i % 700)}
+                                               for i in range(tickets)])
+        conn.execute(insert(mechanic_services), [{"mechanic_id": mechanic_id, "service_id": service_id}
+                                                 for service_id in range(1, tickets + 1)
+                                                 for mechanic_id in random.sample(range(1, mechanics + 1), 2)])
+    return engine
+
+
+def hot_queries(tickets):
+    ticket_counts = (select(mechanic_services.c.mechanic_id, func.count().label("ticket_count"))
+                     .group_by(mechanic_services.c.mechanic_id).subquery())
+    return {
+        "my-tickets page (customer_id)": select(Service_tickets).where(Service_tickets.customer_id == 42, Service_tickets.id > 0)
+                                         .order_by(Service_tickets.id).limit(26),
+        "customer history by date": select(Service_tickets).where(Service_tickets.customer_id == 42)
+                                    .order_by(Service_tickets.service_date.desc()),
+        "ticket by VIN": select(Service_tickets).where(Service_tickets.VIN == f"VIN{tickets // 2:014d}"),
+        "mechanics of a ticket": select(mechanic_services.c.mechanic_id).where(mechanic_services.c.service_id == tickets // 2),
+        "assignment check": select(mechanic_services).where(mechanic_services.c.mechanic_id == 5,
+                                                            mechanic_services.c.service_id == tickets // 2),
+        "popular mechanics GROUP BY": select(Mechanics.id, func.coalesce(ticket_counts.c.ticket_count, 0).label("n"))
+                                      .outerjoin(ticket_counts, ticket_counts.c.mechanic_id == Mechanics.id)
+                                      .order_by(text("n DESC"), Mechanics.id).limit(10),
+    }
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def mean_time(conn, statement, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        conn.execute(statement).all()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Before/after query plans for the hot lookup indexes")
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--mechanics", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    engines = {label: build_database(indexed, args.tickets, args.customers, args.mechanics)
+               for label, indexed in (("before", False), ("after", True))}
+
+    for name, statement in hot_queries(args.tickets).items():
+        print(f"\n=== {name}")
+        for label, engine in engines.items():
+            with engine.connect() as conn:
+                plan = explain(conn, statement)
+                elapsed = mean_time(conn, statement, args.runs)
+            print(f"  {label:<6} {elapsed:9.3f} ms   " + "\n                          ".join(plan))
+
+
+if __name__ == "__main__":
+    main()
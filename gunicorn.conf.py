@@ -0,0 +1,36 @@
+### gunicorn settings for wsgi:app (gunicorn -c gunicorn.conf.py wsgi:app) ###
+##
+## preload_app imports wsgi.py (create_app, schemas, row serializers) once in the master so workers share that memory;
+## every worker drops the inherited db pool right after fork (wsgi.register_fork_safety) and warms its own in post_fork,
+## after which GET /ready answers 200. If the database is down the worker still starts and /ready answers 503, retrying
+## the warm up on later probes, instead of gunicorn respawning crashing workers.
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("WEB_THREADS", 4))  ## > 1 selects the gthread worker; keep the db pool at least this large
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 0))  ## recycle workers after this many requests, 0 = never
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 0))
+accesslog = os.environ.get("WEB_ACCESS_LOG", "-")
+
+
+def post_fork(server, worker):
+    from wsgi import app
+    from application.utils.lifecycle import try_warm_up
+    warmed = try_warm_up(app)
+    if warmed is None:
+        worker.log.warning("worker %s: database unreachable, not ready until a /ready probe warms the pool", worker.pid)
+    else:
+        worker.log.info("worker %s: %s database connections warm", worker.pid, warmed)
+
+
+def worker_exit(server, worker):
+    from wsgi import app
+    from application.utils.lifecycle import shutdown
+    shutdown(app)
@@ -0,0 +1,7 @@
+-- Adds the supplier part number used as the natural key by POST /inventories/import.
+-- db.create_all() only creates missing tables, run this once on an existing MySQL database:
+--   mysql -u root -p mechanic_shop_db < migrations/001_inventory_sku.sql
+
+ALTER TABLE inventories
+    ADD COLUMN sku VARCHAR(100) NULL,
+    ADD CONSTRAINT uq_inventories_sku UNIQUE (sku);
@@ -0,0 +1,19 @@
+-- One service_inventory row per (service ticket, part), required by the add_part/add_parts upsert.
+-- Existing duplicate rows are merged into the oldest row (quantities summed) before the constraint is added:
+--   mysql -u root -p mechanic_shop_db < migrations/002_service_inventory_unique.sql
+
+UPDATE service_inventory si
+JOIN (SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+      FROM service_inventory
+      GROUP BY service_ticket_id, inventory_id
+      HAVING COUNT(*) > 1) dup ON si.id = dup.keep_id
+SET si.quantity = dup.total;
+
+DELETE si FROM service_inventory si
+JOIN service_inventory keep_row
+  ON keep_row.service_ticket_id = si.service_ticket_id
+ AND keep_row.inventory_id = si.inventory_id
+ AND keep_row.id < si.id;
+
+ALTER TABLE service_inventory
+    ADD CONSTRAINT uq_service_inventory_ticket_part UNIQUE (service_ticket_id, inventory_id);
@@ -0,0 +1,25 @@
+-- Index pass for the hot lookup columns (see benchmarks/query_plans.py for the before/after plans):
+--   * mechanic_services gets a composite primary key (mechanic_id, service_id) and an index on service_id
+--   * service_tickets gets (customer_id, service_date) and VIN indexes
+-- Duplicate assignment rows are removed first, the table had no key so they could exist:
+--   mysql -u root -p mechanic_shop_db < migrations/003_hot_lookup_indexes.sql
+
+CREATE TABLE mechanic_services_dedup AS
+    SELECT DISTINCT mechanic_id, service_id
+    FROM mechanic_services
+    WHERE mechanic_id IS NOT NULL AND service_id IS NOT NULL;
+
+DELETE FROM mechanic_services;
+INSERT INTO mechanic_services (mechanic_id, service_id)
+    SELECT mechanic_id, service_id FROM mechanic_services_dedup;
+DROP TABLE mechanic_services_dedup;
+
+ALTER TABLE mechanic_services
+    MODIFY mechanic_id INT NOT NULL,
+    MODIFY service_id INT NOT NULL,
+    ADD PRIMARY KEY (mechanic_id, service_id),
+    ADD INDEX ix_mechanic_services_service_id (service_id);
+
+ALTER TABLE service_tickets
+    ADD INDEX ix_service_tickets_customer_date (customer_id, service_date),
+    ADD INDEX ix_service_tickets_vin (VIN);
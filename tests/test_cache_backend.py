@@ -0,0 +1,49 @@
+from application import create_app
+from application.extensions import cache
+from application.utils.cache_backend import CompressedSerializer, make_serializer
+from cachelib.serializers import RedisSerializer
+from unittest import mock
+import config
+import unittest
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+class TestCacheBackend(unittest.TestCase):
+        ###   Unit tests for the shared production cache backend and its serializers  ###
+
+    def test_compressed_serializer_round_trip(self):
+        serializer = CompressedSerializer(threshold=64)
+        small = {"id": 1, "name": "Oil filter"}
+        large = [{"id": i, "name": "Oil filter", "price": 9.99} for i in range(200)]
+
+        self.assertTrue(serializer.dumps(small).startswith(b"!"))
+        self.assertTrue(serializer.dumps(large).startswith(b"z"))
+        self.assertLess(len(serializer.dumps(large)), len(RedisSerializer().dumps(large)))
+        self.assertEqual(serializer.loads(serializer.dumps(small)), small)
+        self.assertEqual(serializer.loads(serializer.dumps(large)), large)
+        self.assertEqual(serializer.loads(RedisSerializer().dumps(small)), small)   # entries written before the switch
+        self.assertIsNone(serializer.loads(None))
+
+    def test_make_serializer_by_name_or_import_path(self):
+        self.assertIsInstance(make_serializer("pickle"), RedisSerializer)
+        self.assertIsInstance(make_serializer("compressed"), CompressedSerializer)
+        self.assertIsInstance(make_serializer("cachelib.serializers.RedisSerializer"), RedisSerializer)
+
+    @unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+    def test_production_config_uses_shared_prefixed_cache(self):
+        with mock.patch.multiple(config.ProductionConfig, CACHE_REDIS_URL="fakeredis://",
+                                 CACHE_KEY_PREFIX="mechanic_shop:test:"):
+            app = create_app('ProductionConfig')
+        with app.app_context():
+            backend = app.extensions["cache"][cache]
+            self.assertIsInstance(backend.serializer, CompressedSerializer)
+            cache.set("inventories", [{"id": 1}])
+            self.assertEqual(cache.get("inventories"), [{"id": 1}])
+            self.assertTrue(backend._write_client.exists("mechanic_shop:test:inventories"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+from application import create_app, db
+from application.models import Customer, Inventory, Service_tickets
+from application.utils.compression import GzipCodec
+from datetime import date
+import gzip
+import json
+import unittest
+
+class TestCompression(unittest.TestCase):
+        ###   Unit tests for Accept-Encoding negotiation, pre-compressed cache entries and streamed compression  ###
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(name="test_user", email="test@email.com", password="test",
+                                address="1st test street", phone="123-4645-3234", salary=50000.0)
+            db.session.add(customer)
+            db.session.flush()
+            db.session.add_all([Inventory(name=f"Brake pad set {i}", price=49.99) for i in range(100)])
+            db.session.add_all([Service_tickets(VIN=f"1HGCM82633A{i:06d}", customer_issue="Oil Change",
+                                                service_date=date(2025, 7, 1), customer_id=customer.id) for i in range(50)])
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_large_response_is_gzipped_when_accepted(self):
+        plain = self.client.get('/inventories/')
+        compressed = self.client.get('/inventories/', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertLess(len(compressed.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(compressed.data)), plain.json)
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.get('/inventories/1', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_cache_hit_serves_precompressed_body(self):
+        first = self.client.get('/inventories/', headers={'Accept-Encoding': 'gzip'})
+        second = self.client.get('/inventories/', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(second.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(second.data, first.data)
+        report = self.app.extensions['query_detector'].reports[-1]
+        self.assertEqual(report.count, 0)   # served from the cache, nothing queried
+
+    def test_compressed_etag_and_conditional_get(self):
+        response = self.client.get('/inventories/', headers={'Accept-Encoding': 'gzip'})
+        etag = response.headers['ETag'].strip('"')
+        self.assertTrue(etag.endswith('-gzip'))
+
+        not_modified = self.client.get('/inventories/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers['ETag'].strip('"'), etag)
+
+        plain = self.client.get('/inventories/')
+        self.assertNotEqual(plain.headers['ETag'].strip('"'), etag)   # identity is a different representation
+
+    def test_streamed_export_is_compressed(self):
+        response = self.client.get('/service-tickets/export', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+
+        rows = [json.loads(line) for line in gzip.decompress(response.data).decode().splitlines()]
+        self.assertEqual(len(rows), 50)
+
+    def test_gzip_codec_stream_round_trip(self):
+        chunks = [b'{"id": %d}\n' % i for i in range(1000)]
+        self.assertEqual(gzip.decompress(b"".join(GzipCodec().stream(chunks))), b"".join(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
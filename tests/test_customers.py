@@ -1,7 +1,13 @@
 
 from application import create_app, db
 from application.models import Customer
+from application.utils.passwords import PasswordHasher, PasswordPoolBusy
 from application.utils.util import encode_token
+import base64
+import json
+import threading
+import time
+from unittest import mock
 import unittest   ## Imports Python’s unittest framework for setting up and running tests.
 
 class TestCustomer(unittest.TestCase):
@@ -81,6 +87,44 @@ class TestCustomer(unittest.TestCase):
         self.assertIn('error', response.json)
         self.assertEqual(response.json['error'],"Email already associated with an account.")
     
+    ##=============================== Create Customers in bulk Testcase =============================##
+
+    def test_create_customers_bulk_json_success(self):
+        payload = [dict(self.customer_payload, email=f"bulk{i}@gmail.com") for i in range(3)]
+        payload.append(dict(self.customer_payload, email="test@email.com"))    # already in the db
+        payload.append(dict(self.customer_payload, email="bulk0@gmail.com"))   # duplicate inside the request
+        payload.append({"name": "missing fields"})
+
+        response = self.client.post('/customers/bulk', json=payload)
+
+        print("Bulk Response JSON:", response.json)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created'], 3)
+        self.assertEqual(response.json['failed'], 3)
+        self.assertEqual([error['row'] for error in response.json['errors']], [3, 4, 5])
+        self.assertEqual(response.json['errors'][0]['errors']['email'], ["Email already associated with an account."])
+        self.assertIn('password', response.json['errors'][2]['errors'])
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Customer).count(), 5)
+
+    def test_create_customers_bulk_ndjson_success(self):
+        lines = [json.dumps(dict(self.customer_payload, email=f"ndjson{i}@gmail.com")) for i in range(2)]
+        lines.append("{not json")
+
+        response = self.client.post('/customers/bulk', data="\n".join(lines) + "\n",
+                                    content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created'], 2)
+        self.assertEqual(response.json['errors'], [{"row": 2, "errors": {"_schema": ["Invalid JSON."]}}])
+
+        ## Negative Test: body that is not a list ##
+    def test_create_customers_bulk_invalid_body(self):
+        response = self.client.post('/customers/bulk', json=self.customer_payload)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "Expecting a JSON array of customers or an NDJSON body.")
+
     def tearDown(self):
         with self.app.app_context():
             db.session.remove()    ## To ensure clean DB reset after each test 
@@ -127,6 +171,123 @@ class TestCustomer(unittest.TestCase):
         self.assertEqual(response.status_code , 401)
         self.assertEqual(response.json['messages'], 'Invalid email or password')
 
+    def test_unknown_email_login_still_checks_a_hash(self):
+        # same work as a wrong password, so the response time does not tell which emails are registered
+        from application.utils import passwords
+        with mock.patch.object(passwords, 'check_password_hash', wraps=passwords.check_password_hash) as check:
+            unknown = self.client.post('/customers/login', json={"email": "nobody@email.com", "password": "bad_pw"})
+            wrong = self.client.post('/customers/login', json={"email": "test@email.com", "password": "bad_pw"})
+        self.assertEqual((unknown.status_code, wrong.status_code), (401, 401))
+        self.assertEqual(check.call_count, 2)
+        self.assertTrue(check.call_args_list[0].args[0].startswith("pbkdf2:sha256:1000$"))   # dummy hash, current method
+
+    def test_login_upgrades_plaintext_and_outdated_hashes(self):
+        with self.app.app_context():   # setUp already logged in customer1, its plaintext password is now a hash
+            customer = db.session.get(Customer, self.customer1_id)
+            self.assertTrue(customer.password.startswith(self.app.config['PASSWORD_HASH_METHOD'] + "$"))
+            self.assertEqual(db.session.get(Customer, self.customer2_id).password, "test1")
+
+        response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "test"})
+        self.assertEqual(response.status_code, 200)   # the hash verifies on the next login
+
+        self.app.extensions['password_hasher'].method = "pbkdf2:sha256:2000"   # cost raised
+        response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "test"})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            self.assertTrue(db.session.get(Customer, self.customer1_id).password.startswith("pbkdf2:sha256:2000$"))
+
+        response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "wrong"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_selects_only_the_needed_columns(self):
+        from sqlalchemy import event
+        with self.app.app_context():
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "test"})
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(statements), 1)   # already hashed, no rehash update
+        self.assertNotIn("salary", statements[0])
+        self.assertNotIn("address", statements[0])
+
+    def test_created_customer_password_is_hashed_and_not_returned(self):
+        response = self.client.post('/customers/', json=self.customer_payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("password", response.json["customer"])
+        with self.app.app_context():
+            customer = db.session.get(Customer, response.json["customer"]["id"])
+            self.assertNotEqual(customer.password, "saba")
+
+        response = self.client.post('/customers/login', json={"email": "saba@gmail.com", "password": "saba"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_returns_503_when_the_password_pool_is_full(self):
+        hasher = self.app.extensions['password_hasher']
+        hasher.wait = 0.01
+        while hasher.slots.acquire(blocking=False):   # every slot busy
+            pass
+        response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "test"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+    def test_create_customers_bulk_emails_are_case_insensitive(self):
+        payload = [dict(self.customer_payload, email="Bulk@gmail.com"),
+                   dict(self.customer_payload, email="bulk@gmail.com"),      # same email, other case
+                   dict(self.customer_payload, email="TEST@email.com")]      # already in the db as test@email.com
+        response = self.client.post('/customers/bulk', json=payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created'], 1)
+        self.assertEqual([error['row'] for error in response.json['errors']], [1, 2])
+
+    def test_create_customers_bulk_reports_rows_the_database_rejects(self):
+        payload = [dict(self.customer_payload, email=f"bulk{i}@gmail.com") for i in range(3)]
+        payload.insert(1, dict(self.customer_payload, email="test@email.com"))
+        self.app.config['CUSTOMERS_BULK_BATCH_SIZE'] = 2   # 2 batches, only the first one is retried row by row
+        # the email check misses test@email.com, like a customer created concurrently after it ran
+        with mock.patch('application.blueprints.customers.routes.taken_emails', return_value=set()):
+            response = self.client.post('/customers/bulk', json=payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['created'], 3)
+        self.assertEqual(response.json['errors'], [{"row": 1, "errors": {"email": ["Email already associated with an account."]}}])
+        with self.app.app_context():
+            emails = set(db.session.execute(db.select(Customer.email)).scalars())
+        self.assertTrue({"bulk0@gmail.com", "bulk1@gmail.com", "bulk2@gmail.com"} <= emails)
+
+    def test_create_customers_bulk_returns_503_while_another_import_hashes(self):
+        hasher = self.app.extensions['password_hasher']
+        hasher.wait = 0.01
+        with self.app.app_context():
+            before = db.session.query(Customer).count()
+        hasher.bulk_slots.acquire()   # another import is hashing
+        try:
+            response = self.client.post('/customers/bulk', json=[dict(self.customer_payload, email="bulk@gmail.com")])
+        finally:
+            hasher.bulk_slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Customer).count(), before)
+
+    def test_bulk_hashing_does_not_delay_logins_and_hashing_times_out(self):
+        hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, timeout=0.05, bulk_workers=1, bulk_timeout=0.05)
+        release = threading.Event()
+        try:
+            hasher.bulk_executor.submit(release.wait)   # bulk thread busy
+            self.assertTrue(hasher.hash("secret").startswith("pbkdf2:sha256:1000$"))
+            with self.assertRaises(PasswordPoolBusy):
+                hasher.hash_many(["a", "b"])
+
+            hasher.executor.submit(release.wait)        # login thread busy
+            with self.assertRaises(PasswordPoolBusy):
+                hasher.hash("secret")
+        finally:
+            release.set()
+
     ##=========================== Retrieve all Customers using pagination Testcase ===========================##
 
     def test_get_customers_with_pagination_success(self):
@@ -158,6 +319,48 @@ class TestCustomer(unittest.TestCase):
         self.assertIn('test@email.com', emails)
         self.assertIn('test1@email.com', emails)
 
+    def test_get_customers_with_cursor_success(self):
+            # Walk every page using the X-Next-Cursor header, one customer per page
+        first_page = self.client.get('/customers/?per_page=1')
+
+        self.assertEqual(first_page.status_code, 200)
+        self.assertEqual(len(first_page.json), 1)
+        self.assertEqual(first_page.json[0]['id'], self.customer1_id)
+        cursor = first_page.headers.get('X-Next-Cursor')
+        self.assertIsNotNone(cursor)
+
+        second_page = self.client.get(f'/customers/?per_page=1&cursor={cursor}')
+
+        self.assertEqual(second_page.status_code, 200)
+        self.assertEqual(len(second_page.json), 1)
+        self.assertEqual(second_page.json[0]['id'], self.customer2_id)
+        self.assertNotIn('X-Next-Cursor', second_page.headers)   # last page has no next cursor
+
+    def test_get_customers_per_page_is_capped(self):
+        self.app.config['PAGINATION_MAX_PER_PAGE'] = 1
+
+        response = self.client.get('/customers/?per_page=500')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 1)
+        self.assertIn('X-Next-Cursor', response.headers)
+
+            ## Negative Test: malformed paging params are rejected instead of loading the whole table ##
+    def test_get_customers_invalid_paging_params(self):
+        response = self.client.get('/customers/?per_page=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "per_page must be an integer.")
+
+        response = self.client.get('/customers/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "Invalid cursor.")
+
+        for payload in (b'{"id":true}', b'{"id":1000000000000000000000000000000}', b'{"id":-1}', b'{"id":1.5}'):
+            cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+            response = self.client.get(f'/customers/?cursor={cursor}')
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertEqual(response.json['error'], "Invalid cursor.")
+
     ##============================== Retrieve Specific Customer  Testcase ==============================##
 
     def test_get_customer_by_id_success(self):
@@ -206,6 +409,14 @@ class TestCustomer(unittest.TestCase):
         self.assertEqual(response.json["customer"]["name"], "sabaresh")
         self.assertEqual(response.json["customer"]["phone"], "123-2342-3211")
 
+    def test_update_customer_invalidates_cached_pages(self):
+        self.assertEqual(self.client.get('/customers/?per_page=1').json[0]['name'], "test_user")   # now cached
+
+        payload = dict(self.customer_payload, name="renamed")
+        response = self.client.put('/customers/', json=payload, headers={"Authorization": f"Bearer {self.auth_token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/customers/?per_page=1').json[0]['name'], "renamed")
+
             #==== Negative TEST: Update with non-existent customer =====#
     def test_update_customer_not_found(self):
         # Create token with fake customer_id (e.g.,999)
@@ -224,11 +435,11 @@ class TestCustomer(unittest.TestCase):
                                                 headers={"Authorization": f"Bearer {fake_token}"})
 
         print("Non-existent user update:", response.json)
-        self.assertEqual(response.status_code, 401)  # Unauthorized
+        self.assertEqual(response.status_code, 404)  # signed claims are trusted, the route itself finds no customer
         print("response_code", response.status_code)
-        self.assertIn("message", response.json)
+        self.assertIn("error", response.json)
 
-        self.assertEqual(response.json["message"], "Invalid token — customer does not exist.")    
+        self.assertEqual(response.json["error"], "customer not found.")    
 
     ##===================== Delete Specific Customer details(token authenticated) Testcase ====================##
 
@@ -248,5 +459,63 @@ class TestCustomer(unittest.TestCase):
         self.assertIn("error", get_response.json)
         self.assertEqual(get_response.json["error"], "Customer not found.")
 
+            # Step 3: The deleted customer's token is revoked
+        put_response = self.client.put('/customers/', json=self.customer_payload,
+                                       headers={"Authorization": f"Bearer {self.auth_token}"})
+        self.assertEqual(put_response.status_code, 401)
+        self.assertEqual(put_response.json["message"], "Token has been revoked!")
+
+    def test_logout_revokes_only_that_token(self):
+        other_token = encode_token(self.customer1_id)
+        response = self.client.post('/customers/logout', headers={"Authorization": f"Bearer {self.auth_token}"})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.put('/customers/', json=self.customer_payload,
+                                   headers={"Authorization": f"Bearer {self.auth_token}"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json["message"], "Token has been revoked!")
+
+        response = self.client.put('/customers/', json=self.customer_payload,
+                                   headers={"Authorization": f"Bearer {other_token}"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_revocation_is_shared_through_the_cache(self):
+        # a second app instance stands in for another worker sharing the cache backend
+        with self.app.app_context():
+            from application.utils.util import revoke_customer_tokens, get_revocation_list
+            get_revocation_list().synced_at = 0
+            revoke_customer_tokens(self.customer2_id)
+            other_worker = type(get_revocation_list())()
+            issued_at = time.time() - 60
+            self.assertTrue(other_worker.is_revoked(issued_at, f"customer:{self.customer2_id}"))
+            self.assertFalse(other_worker.is_revoked(issued_at, f"customer:{self.customer1_id}"))
+
+    def test_revocation_only_rejects_tokens_issued_before_it(self):
+        # a new customer can get the id of a deleted one (SQLite, MySQL < 8.0): their later tokens must work
+        with self.app.app_context():
+            from application.utils.util import revoke_customer_tokens, get_revocation_list
+            revoke_customer_tokens(self.customer1_id)
+            revocations = get_revocation_list()
+            now = time.time()
+            self.assertTrue(revocations.is_revoked(int(now) - 60, f"customer:{self.customer1_id}"))
+            self.assertTrue(revocations.is_revoked(int(now) - 1, f"customer:{self.customer1_id}"))
+            self.assertFalse(revocations.is_revoked(int(now) + 1, f"customer:{self.customer1_id}"))
+
+    def test_auth_runs_no_sql(self):
+        from sqlalchemy import event
+        with self.app.app_context():
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                response = self.client.put('/customers/', json={}, headers={"Authorization": "Bearer not-a-jwt"})
+                self.assertEqual(response.status_code, 401)
+                response = self.client.delete('/customers/', headers={"Authorization": f"Bearer {encode_token(999)}"})
+                self.assertEqual(response.status_code, 404)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+            # only the route's own lookup of the customer, nothing from token_required
+            self.assertEqual(len(statements), 1)
+
     if __name__ == '__main__':
         unittest.main()
\ No newline at end of file
@@ -1,5 +1,7 @@
 from application import create_app, db
 from application.models import  Inventory
+from sqlalchemy import select
+import io
 import unittest 
 
 class TestInventory(unittest.TestCase):
@@ -79,6 +81,72 @@ class TestInventory(unittest.TestCase):
         self.assertIn("error", data)
         self.assertIn("price", data["error"])
     
+    ##===============================  Import Inventory catalog Testcase  ===============================##
+
+    def test_import_inventories_csv_upload_success(self):
+        existing = Inventory(name="Radiator Old", price=10.0, sku="RAD-1")
+        db.session.add(existing)
+        db.session.commit()
+        self.app.config['INVENTORY_IMPORT_CHUNK_SIZE'] = 2   # 5 rows -> 3 chunks
+        catalog = ("sku,name,price,supplier\n"
+                   "RAD-1,Radiator,55.5,acme\n"        # update
+                   "OIL-1,Oil Filter,12.0,acme\n"      # insert
+                   "BAD-1,Spark Plug,free,acme\n"      # rejected: price
+                   ",No Sku,5.0,acme\n"                # rejected: sku
+                   "OIL-1,Oil Filter XL,14.0,acme\n")  # update of the row inserted above
+
+        response = self.client.post('/inventories/import', content_type='multipart/form-data',
+                                    data={"file": (io.BytesIO(catalog.encode()), "catalog.csv")})
+
+        print("Import Response JSON:", response.json)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['inserted'], 1)
+        self.assertEqual(response.json['updated'], 2)
+        self.assertEqual(response.json['rejected'], 2)
+        self.assertEqual([error['line'] for error in response.json['errors']], [4, 5])
+        self.assertIn('price', response.json['errors'][0]['errors'])
+        self.assertIn('sku', response.json['errors'][1]['errors'])
+
+        db.session.expire_all()
+        radiator = db.session.execute(select(Inventory).filter_by(sku="RAD-1")).scalars().one()
+        self.assertEqual((radiator.id, radiator.name, radiator.price), (existing.id, "Radiator", 55.5))
+        oil_filter = db.session.execute(select(Inventory).filter_by(sku="OIL-1")).scalars().one()
+        self.assertEqual((oil_filter.name, oil_filter.price), ("Oil Filter XL", 14.0))
+
+    def test_import_inventories_csv_body_success(self):
+        response = self.client.post('/inventories/import', data="sku,name,price\nTIRE-1,Tire,500\n",
+                                    content_type='text/csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['inserted'], 1)
+
+        ## Negative Test: CSV without the required columns ##
+    def test_import_inventories_missing_columns(self):
+        response = self.client.post('/inventories/import', data="name,price\nTire,500\n", content_type='text/csv')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "CSV header must include sku, name and price.")
+
+    def test_import_inventories_rejects_undecodable_and_malformed_files(self):
+        response = self.client.post('/inventories/import', data=b"sku,name,price\nTIRE-1,Tire,500\nTIRE-2,\xff\xfe,10\n",
+                                    content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json['error'].startswith("File is not valid UTF-8."))
+
+        huge = "x" * 200000   # over csv's field size limit
+        response = self.client.post('/inventories/import', data=f"sku,name,price\nTIRE-1,{huge},500\n",
+                                    content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json['error'].startswith("Malformed CSV"))
+
+    def test_import_inventories_rejects_sku_over_column_length(self):
+        response = self.client.post('/inventories/import', data=f"sku,name,price\n{'S' * 150},Tire,500\nTIRE-1,Tire,500\n",
+                                    content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['inserted'], 1)
+        self.assertEqual(response.json['rejected'], 1)
+        self.assertIn('sku', response.json['errors'][0]['errors'])
+
     def tearDown(self):
         db.session.remove()   ## To ensure clean DB reset after each test 
         db.drop_all()
@@ -144,6 +212,29 @@ class TestInventory(unittest.TestCase):
         self.assertEqual(response.json['Message'],f'Successfully Updated Inventory id: {inventory_id}')
         self.assertEqual(response.json['Inventory']['price'],update_inventory_payload['price'])
 
+    def test_update_inventory_invalidates_cached_list(self):
+        self.assertEqual(self.client.get('/inventories/').json[0]['price'], 50.0)   # now cached
+
+        response = self.client.put(f'/inventories/{self.inventory1_id}', json={"name": "Radiator", "price": 55.0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/inventories/').json[0]['price'], 55.0)
+
+        self.client.delete(f'/inventories/{self.inventory2_id}')
+        self.assertNotIn(self.inventory2_id, [inventory['id'] for inventory in self.client.get('/inventories/').json])
+
+    def test_get_inventories_conditional_get(self):
+        response = self.client.get('/inventories/')
+        etag = response.headers['ETag']
+
+        self.assertEqual(self.client.get('/inventories/', headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.get('/inventories/', headers={'If-None-Match': '"stale"'}).status_code, 200)
+        self.assertEqual(self.client.get(f'/inventories/{self.inventory1_id}', headers={'If-None-Match': etag}).status_code, 200)
+
+        self.client.put(f'/inventories/{self.inventory1_id}', json={"name": "Radiator", "price": 55.0})
+        self.assertEqual(self.client.get('/inventories/', headers={'If-None-Match': etag}).status_code, 200)
+
+        self.assertNotIn('ETag', self.client.get('/inventories/333').headers)   # only 200s get an ETag
+
         ## Negative Test: Update inventory by Invalid ID (404 Case) ##
     def test_update_inventory_not_found(self):
         updated_data = {"name": "Part", "price": 999.0}
@@ -0,0 +1,49 @@
+from application import create_app
+from application.utils.json_provider import ORJSONProvider
+from datetime import date
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from unittest import mock
+import config
+import json
+import unittest
+
+class TestJSONProvider(unittest.TestCase):
+        ###   Unit tests for the orjson backed app.json provider  ###
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.stdlib = DefaultJSONProvider(self.app)
+        self.ticket = {"id": 1, "VIN": "1HGCM82633A004352", "service_date": "2025-07-01", "customer_id": 3,
+                       "customer": {"id": 3, "name": "Zoë", "salary": 50000.0},
+                       "mechanics": [{"id": 2, "name": "test_user2"}, {"id": 1, "name": "test_user1"}]}
+
+    def test_provider_installed_in_create_app(self):
+        self.assertIsInstance(self.app.json, ORJSONProvider)
+
+    def test_stdlib_provider_by_config(self):
+        with mock.patch.object(config.TestingConfig, "JSON_PROVIDER", "stdlib"):
+            app = create_app('TestingConfig')
+        self.assertIs(type(app.json), DefaultJSONProvider)
+
+    def test_same_data_as_stdlib_with_sorted_keys(self):
+        encoded = self.app.json.dumps(self.ticket)
+        self.assertEqual(json.loads(encoded), json.loads(self.stdlib.dumps(self.ticket)))
+        self.assertEqual(list(json.loads(encoded)), sorted(self.ticket))
+
+    def test_native_types(self):
+        encoded = self.app.json.dumps({"service_date": date(2025, 7, 1), "price": Decimal("49.99"), 1: "non str key"})
+        self.assertEqual(json.loads(encoded), {"service_date": "2025-07-01", "price": "49.99", "1": "non str key"})
+
+    def test_falls_back_to_stdlib_for_big_integers(self):
+        self.assertEqual(json.loads(self.app.json.dumps({"n": 2 ** 70})), {"n": 2 ** 70})
+
+    def test_jsonify_response(self):
+        with self.app.test_request_context():
+            response = self.app.json.response(self.ticket)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertTrue(response.data.endswith(b"\n"))
+        self.assertEqual(json.loads(response.data), self.ticket)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+from application import create_app, db
+from application.utils.lifecycle import register_fork_safety, shutdown, try_warm_up, warm_up
+from sqlalchemy import create_engine, inspect
+from unittest import mock
+import json
+import os
+import unittest
+
+
+class TestLifecycle(unittest.TestCase):
+        ###   Unit tests for readiness, pool warm up, fork safety and the create-db command  ###
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            self.engine = db.engine
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_ready_only_after_warm_up(self):
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json, {"status": "starting"})
+
+        warmed = warm_up(self.app)
+        self.assertEqual(warmed, self.engine.pool.size())
+        self.assertEqual(self.engine.pool.checkedin(), warmed)   # open and idle in the pool
+
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["warm_connections"], warmed)
+
+        shutdown(self.app)
+        self.assertEqual(self.client.get('/ready').status_code, 503)
+
+    def test_unreachable_database_leaves_worker_up_and_ready_retries(self):
+        unreachable = create_engine("sqlite:////nonexistent-dir/mechanic_shop.db")
+        with mock.patch("application.utils.lifecycle.engines", return_value=[unreachable]):
+            self.assertIsNone(try_warm_up(self.app))   # logged, not raised: the gunicorn worker keeps running
+            response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json, {"status": "database unavailable"})
+
+        self.assertEqual(self.client.get('/ready').status_code, 503)   # retried at most every READINESS_RETRY_SECONDS
+        self.app.config["READINESS_RETRY_SECONDS"] = 0
+        response = self.client.get('/ready')   # the database is back: this probe warms the pool
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["warm_connections"], self.engine.pool.size())
+
+        shutdown(self.app)
+        self.assertEqual(self.client.get('/ready').json, {"status": "starting"})   # no warm up retries after shutdown
+
+    def test_startup_does_not_create_tables(self):
+        with self.app.app_context():
+            self.assertEqual(inspect(db.engine).get_table_names(), [])
+
+    def test_create_db_command(self):
+        result = self.app.test_cli_runner().invoke(args=["create-db"])
+        self.assertEqual(result.exit_code, 0)
+        with self.app.app_context():
+            self.assertIn("service_tickets", inspect(db.engine).get_table_names())
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_forked_child_gets_its_own_pool(self):
+        register_fork_safety(self.app)
+        warm_up(self.app)
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # child: report what it inherited, then exit without running the test teardown
+            with self.app.app_context():
+                report = {"checked_in": db.engine.pool.checkedin(), "ready": self.app.extensions["lifecycle"]["ready"]}
+            os.write(write_end, json.dumps(report).encode())
+            os._exit(0)
+        os.close(write_end)
+        os.waitpid(pid, 0)
+        report = json.loads(os.read(read_end, 1024))
+        os.close(read_end)
+
+        self.assertEqual(report, {"checked_in": 0, "ready": False})
+        self.assertEqual(self.engine.pool.checkedin(), self.engine.pool.size())   # the parent's connections are untouched
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,10 @@
 from application import create_app, db
 from application.models import Mechanics, Service_tickets, Customer
 from datetime import date
+from application.utils.querycheck import query_budget
+from application.utils.cache_tags import invalidate, tag_versions
+from application.utils.search import LiveIndex
+import threading
 import unittest   ## Imports Python’s unittest framework for setting up and running tests.
 
 class TestMechanic(unittest.TestCase):
@@ -97,6 +101,17 @@ class TestMechanic(unittest.TestCase):
         self.assertIn('test3@email.com', emails)
         self.assertIn('test4@email.com', emails)
 
+    def test_mechanic_writes_invalidate_cached_list(self):
+        self.assertEqual(len(self.client.get('/mechanics/').json), 3)   # now cached
+
+        response = self.client.post('/mechanics/', json={"name": "new_mechanic", "email": "new@email.com",
+                                                         "address": "1st test street", "phone": "123-4645-3234"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.client.get('/mechanics/').json), 4)
+
+        self.client.delete(f"/mechanics/{response.json['Mechanic']['id']}")
+        self.assertEqual(len(self.client.get('/mechanics/').json), 3)
+
     ##============================ Retrieve Specific Mechanic Testcase ==========================##
 
     def test_get_mechanic_by_id_success(self):
@@ -251,6 +266,45 @@ class TestMechanic(unittest.TestCase):
             self.assertTrue(all(services_counts[i] >= services_counts[i+1] for i in range(len(services_counts)-1)))
             print("Popular mechanics order response:", response.json)
 
+    def test_get_popular_mechanics_counts_limit_offset(self):
+        with self.app.app_context():
+            customer = Customer(name="Test Customer", email="customer1@email.com", password="test",
+                                address="123 Test St", phone="123-456-7890", salary=50000.0)
+            db.session.add(customer)
+            db.session.commit()
+
+            services = [Service_tickets(VIN=f"TTT267623463432{i}", customer_issue="Brake Repair", customer_id=customer.id,
+                                        service_date=date(2025,7,20)) for i in range(3)]
+            mechanic3 = db.session.get(Mechanics, self.mechanic3_id)
+            mechanic1 = db.session.get(Mechanics, self.mechanic1_id)
+            mechanic3.services.extend(services)      ## 3 services
+            mechanic1.services.extend(services[:2])  ## 2 services
+            db.session.add_all(services)
+            db.session.commit()
+
+        with query_budget(self.app, 1):   # ranking is one GROUP BY query, no lazy loads
+            response = self.client.get('/mechanics/popular-mechanic')
+
+        self.assertEqual(response.status_code, 200)
+        mechanic_list = response.json["Most popular Mechanics List Order by:"]
+        self.assertEqual([mechanic["id"] for mechanic in mechanic_list], [self.mechanic3_id, self.mechanic1_id, self.mechanic2_id])
+        self.assertEqual([mechanic["ticket_count"] for mechanic in mechanic_list], [3, 2, 0])
+
+        response = self.client.get('/mechanics/popular-mechanic?limit=1&offset=1')
+
+        self.assertEqual(response.status_code, 200)
+        mechanic_list = response.json["Most popular Mechanics List Order by:"]
+        self.assertEqual(len(mechanic_list), 1)
+        self.assertEqual(mechanic_list[0]["id"], self.mechanic1_id)
+        self.assertEqual(mechanic_list[0]["ticket_count"], 2)
+
+        ## Negative Test: invalid limit ##
+    def test_get_popular_mechanics_invalid_limit(self):
+        response = self.client.get('/mechanics/popular-mechanic?limit=abc')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "limit and offset must be integers.")
+
     ##========== Retrieve a list of mechanic name(use search passing parameter with  name) Testcase  ============##
         
     def test_search_mechanic_by_name_success(self):
@@ -275,5 +329,92 @@ class TestMechanic(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.json, list)        
     
+    def test_search_mechanic_ranked_prefix_and_fuzzy(self):
+        for name, email in [("Meena", "meena@email.com"), ("Ameen", "ameen@email.com"), ("Peter Meen", "peter@email.com")]:
+            self.client.post('/mechanics/', json=dict(self.mechanic_payload, name=name, email=email))
+
+        response = self.client.get('/mechanics/search?name=meen')
+
+        self.assertEqual(response.status_code, 200)
+        names = [mechanic['name'] for mechanic in response.json]
+        self.assertEqual(names, ["Meena", "Peter Meen", "Ameen"])   # name prefix, word prefix, then substring
+
+        response = self.client.get('/mechanics/search?name=meena&limit=1')
+        self.assertEqual([mechanic['name'] for mechanic in response.json], ["Meena"])
+
+        response = self.client.get('/mechanics/search?name=meana')   # typo, fuzzy match
+        self.assertIn("Meena", [mechanic['name'] for mechanic in response.json])
+
+    def test_search_mechanic_fuzzy_matches_each_word(self):
+        for name, email in [("John Smith", "john@email.com"), ("Maria Lopez", "maria@email.com")]:
+            self.client.post('/mechanics/', json=dict(self.mechanic_payload, name=name, email=email))
+
+        for query, expected in [("jonh", ["John Smith"]), ("marai", ["Maria Lopez"]), ("smiht jonh", ["John Smith"]),
+                                ("lopes", ["Maria Lopez"]), ("jonh lopez", []), ("jnh", [])]:
+            response = self.client.get(f'/mechanics/search?name={query}')
+            self.assertEqual([mechanic['name'] for mechanic in response.json], expected, query)
+
+    def test_search_index_is_not_rebuilt_for_its_own_writes(self):
+        self.client.get('/mechanics/search?name=test')   # builds the index
+        live = self.app.extensions['mechanic_search_index']
+
+        self.client.post('/mechanics/', json=dict(self.mechanic_payload, name="Suresh"))
+        self.client.put(f'/mechanics/{self.mechanic1_id}', json=dict(self.mechanic_payload, name="Rajesh", email="rajesh@email.com"))
+        self.client.delete(f'/mechanics/{self.mechanic2_id}')
+
+        self.assertEqual([mechanic['name'] for mechanic in self.client.get('/mechanics/search?name=suresh').json], ["Suresh"])
+        self.assertIsNone(live.thread)   # the writes handed their tag versions over, no background rebuild
+        with self.app.app_context():
+            self.assertEqual(live.version, tag_versions("mechanics")["mechanics"])
+
+    def test_search_mechanic_index_follows_writes(self):
+        response = self.client.get('/mechanics/search?name=test_user2')   # builds the index
+        self.assertEqual(response.json[0]['id'], self.mechanic1_id)
+
+        self.client.put(f'/mechanics/{self.mechanic1_id}', json=dict(self.mechanic_payload, name="Rajesh"))
+        response = self.client.get('/mechanics/search?name=rajesh')
+        self.assertEqual([mechanic['id'] for mechanic in response.json], [self.mechanic1_id])
+        response = self.client.get('/mechanics/search?name=test_user2')
+        self.assertNotIn(self.mechanic1_id, [mechanic['id'] for mechanic in response.json])
+
+        self.client.delete(f'/mechanics/{self.mechanic1_id}')
+        self.assertEqual(self.client.get('/mechanics/search?name=rajesh').json, [])
+
+    def test_search_index_rebuilds_when_another_worker_writes(self):
+        self.client.get('/mechanics/search?name=test')   # builds the index
+        with self.app.app_context():
+            db.session.add(Mechanics(name="Suresh", email="suresh@email.com", address="1st street", phone="123-456-7890"))
+            db.session.commit()   # written by another worker: only the cache tag tells this one
+            invalidate("mechanics")
+
+        self.assertEqual(self.client.get('/mechanics/search?name=suresh').json, [])   # old index, rebuild started
+        self.app.extensions['mechanic_search_index'].thread.join()
+        self.assertEqual([mechanic['name'] for mechanic in self.client.get('/mechanics/search?name=suresh').json], ["Suresh"])
+
+    def test_search_index_keeps_writes_made_during_a_rebuild(self):
+        rows = [(1, "Meena")]
+        live = LiveIndex(self.app, lambda: list(rows))
+        live.get("v1")
+
+        loading, release = threading.Event(), threading.Event()
+        def slow_load():
+            loading.set()
+            release.wait()
+            return list(rows)   # read before the write below was committed
+        live.load = slow_load
+        self.assertEqual(live.get("v2").search("meena"), [1])   # served from the old index while rebuilding
+        loading.wait()
+        live.add(2, "Ravi")
+        release.set()
+        live.thread.join()
+
+        self.assertEqual(live.version, "v2")
+        self.assertEqual(live.get("v2").search("ravi"), [2])
+
+    def test_search_mechanic_missing_param(self):
+        response = self.client.get('/mechanics/search')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [])
+
     if __name__ == '__main__':
         unittest.main()
\ No newline at end of file
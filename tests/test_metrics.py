@@ -0,0 +1,98 @@
+from application import create_app, db
+from application.models import Customer, Mechanics
+from application.utils.metrics import PoolMetrics
+from sqlalchemy import create_engine, exc
+import os
+import tempfile
+import unittest
+
+class TestMetrics(unittest.TestCase):
+        ###   Unit tests for the /metrics endpoint and the per request instrumentation  ###
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add_all([Customer(name="test_user", email="test@email.com", password="test",
+                                         address="1st test street", phone="123-4645-3234", salary=50000.0),
+                                Mechanics(name="test_mechanic", email="mechanic@email.com",
+                                          address="1st test street", phone="123-4645-3234")])
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def metric_value(self, text, line_prefix):
+        for line in text.splitlines():
+            if line.startswith(line_prefix):
+                return float(line.rsplit(" ", 1)[1])
+        self.fail(f"{line_prefix} not found in /metrics output")
+
+    def test_metrics_exposed_in_prometheus_format(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        self.assertIn("# TYPE http_request_duration_seconds histogram", response.text)
+        self.assertIn("# TYPE http_requests_total counter", response.text)
+
+    def test_records_latency_sql_serialization_and_size_per_endpoint(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/customers/').status_code, 200)
+        self.client.get('/customers/999')
+
+        text = self.client.get('/metrics').text
+        endpoint = 'endpoint="customers_bp.get_customers"'
+        self.assertEqual(self.metric_value(text, f'http_requests_total{{{endpoint},status="200"}}'), 3)
+        self.assertEqual(self.metric_value(text, f'http_request_duration_seconds_bucket{{{endpoint},le="+Inf"}}'), 3)
+        self.assertEqual(self.metric_value(text, f'http_request_duration_seconds_count{{{endpoint}}}'), 3)
+        self.assertEqual(self.metric_value(text, 'http_requests_total{endpoint="customers_bp.get_customer",status="404"}'), 1)
+
+        # the first request runs the query and fills the cache, the other two are cache hits without SQL
+        self.assertEqual(self.metric_value(text, f'http_request_sql_queries_sum{{{endpoint}}}'), 1)
+        self.assertEqual(self.metric_value(text, f'http_request_sql_queries_bucket{{{endpoint},le="0"}}'), 2)
+        self.assertGreater(self.metric_value(text, f'http_request_sql_seconds_sum{{{endpoint}}}'), 0)
+        self.assertGreater(self.metric_value(text, f'http_request_serialization_seconds_sum{{{endpoint}}}'), 0)
+        self.assertGreater(self.metric_value(text, f'http_response_size_bytes_sum{{{endpoint}}}'), 0)
+
+    def test_metrics_endpoint_is_not_rate_limited(self):
+        for _ in range(60):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+
+    def test_pool_checkout_metrics(self):
+        self.client.get('/customers/')
+        text = self.client.get('/metrics').get_data(as_text=True)
+
+        self.assertGreaterEqual(self.metric_value(text, 'db_pool_checkout_seconds_count{pool="default"}'), 1)
+        self.assertEqual(self.metric_value(text, 'db_pool_timeouts_total{pool="default"}'), 0)
+        self.assertEqual(self.metric_value(text, 'db_pool_size{pool="default"}'), 5)
+
+    def test_pool_metrics_survive_engine_dispose(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        self.client.get('/customers/')
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertGreaterEqual(self.metric_value(text, 'db_pool_checkout_seconds_count{pool="default"}'), 1)
+
+    def test_pool_timeout_and_saturation(self):
+        path = os.path.join(tempfile.mkdtemp(), "pool.db")
+        engine = create_engine(f"sqlite:///{path}", pool_size=1, max_overflow=0, pool_timeout=0.01)
+        metrics = PoolMetrics("test", engine)
+        held = engine.connect()
+        try:
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+            gauges = dict(metrics.gauges())
+            self.assertEqual(metrics.timeouts, 1)
+            self.assertEqual(gauges["db_pool_checked_out"], 1)
+            self.assertEqual(gauges["db_pool_saturation"], 1.0)
+        finally:
+            held.close()
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
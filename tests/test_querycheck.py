@@ -0,0 +1,88 @@
+from application import create_app, db
+from application.models import Customer, Mechanics, Service_tickets
+from application.utils.querycheck import query_shape, query_budget, QueryBudgetExceeded
+from datetime import date
+from flask import jsonify
+from sqlalchemy import select
+import unittest
+
+class TestQueryDetector(unittest.TestCase):
+        ###   Unit tests for the N+1 detector and per route query budgets (enabled in TestingConfig)  ###
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.app.add_url_rule('/lazy-tickets', 'lazy_tickets', lazy_tickets)  # deliberately loads mechanics one ticket at a time
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(name="test_user", email="test@email.com", password="test",
+                                address="1st test street", phone="123-4645-3234", salary=50000.0)
+            mechanic = Mechanics(name="test_mechanic", email="mechanic@email.com",
+                                 address="1st test street", phone="123-4645-3234")
+            db.session.add_all([customer, mechanic])
+            db.session.flush()
+            for i in range(6):
+                ticket = Service_tickets(VIN=f"1HGCM82633A00435{i}", customer_issue="Oil Change",
+                                         service_date=date(2025, 7, 1), customer_id=customer.id)
+                ticket.mechanics.append(mechanic)
+                db.session.add(ticket)
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_query_shape_ignores_parameters(self):
+        self.assertEqual(query_shape("SELECT a FROM t WHERE id IN (?, ?, ?) LIMIT 26"),
+                         query_shape("SELECT a FROM t WHERE id IN (?)   LIMIT 11"))
+        self.assertEqual(query_shape("SELECT a FROM t WHERE id = %(id_1)s"), query_shape("SELECT a FROM t WHERE id = %(id_2)s"))
+        self.assertNotEqual(query_shape("SELECT a FROM t WHERE id = ?"), query_shape("SELECT b FROM t WHERE id = ?"))
+
+    def test_repeated_query_shapes_fail_the_request(self):
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            self.client.get('/lazy-tickets')
+        self.assertIn("possible N+1", str(error.exception))
+        self.assertIn("x6", str(error.exception))
+
+    def test_route_budget_from_config(self):
+        self.app.extensions["query_detector"].budgets["customers_bp.get_customer"] = 0
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            self.client.get('/customers/1')
+        self.assertIn("query budget exceeded: 1 > 0", str(error.exception))
+
+    def test_query_budget_context_manager(self):
+        with query_budget(self.app, 2) as reports:
+            response = self.client.get('/service-tickets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reports[-1].endpoint, "serviceTickets_bp.get_service_tickets")
+
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(self.app, 0):
+                self.client.get('/mechanics/')
+
+    def test_query_budget_still_fails_once_the_report_history_is_full(self):
+        state = self.app.extensions['query_detector']
+        while len(state.reports) < state.reports.maxlen:
+            self.client.get('/metrics')
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(self.app, 0):
+                self.client.get('/mechanics/')
+        self.assertEqual(state.collectors, [])
+
+    def test_batched_views_may_repeat_query_shapes(self):
+        self.app.config['INVENTORY_IMPORT_CHUNK_SIZE'] = 1   # 6 chunks: 6 x (SELECT sku IN, upsert)
+        csv_body = "sku,name,price\n" + "".join(f"PART-{i},Part {i},{i}.5\n" for i in range(6))
+        response = self.client.post('/inventories/import', data=csv_body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['inserted'], 6)
+        self.assertTrue(self.app.extensions['query_detector'].reports[-1].repeated)   # still measured, not reported
+
+
+def lazy_tickets():
+    tickets = db.session.execute(select(Service_tickets)).scalars().all()
+    return jsonify([len(ticket.mechanics) for ticket in tickets])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+from application import create_app, db
+from application.extensions import limiter
+from application.models import Customer, Service_tickets
+from application.utils.rate_limits import BatchedStorage
+from datetime import date
+from limits import RateLimitItemPerMinute
+from limits.storage import MemoryStorage, storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from unittest import mock
+import config
+import unittest
+
+
+class CountingStorage(MemoryStorage):
+    ### Shared stand-in for redis that counts the round trips ###
+    def __init__(self):
+        super().__init__("memory://")
+        self.round_trips = 0
+
+    def incr(self, key, expiry, amount=1):
+        self.round_trips += 1
+        return super().incr(key, expiry, amount=amount)
+
+
+class TestBatchedStorage(unittest.TestCase):
+        ###   Unit tests for the shared, locally batched limiter storage  ###
+    def setUp(self):
+        self.shared = CountingStorage()
+        self.workers = [BatchedStorage("batched+memory://", flush_interval=60, max_batch=10, storage=self.shared)
+                        for _ in range(2)]
+
+    def test_hits_are_batched(self):
+        counts = [self.workers[0].incr("limit", 60) for _ in range(25)]
+        self.assertEqual(counts, list(range(1, 26)))
+        self.assertEqual(self.shared.round_trips, 3)   # first hit of the window + a flush every 10 hits
+        self.assertEqual(self.shared.get("limit"), 21)   # the last 4 hits are still local
+
+        self.workers[0].flush()
+        self.assertEqual(self.shared.get("limit"), 25)
+
+    def test_limit_is_shared_between_workers(self):
+        item = RateLimitItemPerMinute(30)
+        strategies = [FixedWindowRateLimiter(worker) for worker in self.workers]
+        allowed = sum(strategies[i % 2].hit(item, "127.0.0.1") for i in range(60))
+        self.assertLessEqual(allowed, 30 + 2 * 9)   # at most max_batch - 1 extra hits per worker
+        self.assertLess(allowed, 60)
+        for worker in self.workers:
+            worker.flush()
+        self.assertEqual(self.shared.get(item.key_for("127.0.0.1")), 60)
+
+    def test_flush_interval_zero_writes_through(self):
+        worker = BatchedStorage("batched+memory://", flush_interval=0, storage=self.shared)
+        for _ in range(5):
+            worker.incr("limit", 60)
+        self.assertEqual(self.shared.round_trips, 5)
+
+    def test_storage_uri_scheme(self):
+        storage = storage_from_string("batched+memory://", max_batch=5)
+        self.assertIsInstance(storage, BatchedStorage)
+        self.assertIsInstance(storage.storage, MemoryStorage)
+        self.assertEqual(storage.max_batch, 5)
+        self.assertTrue(storage.check())
+
+
+class TestCostWeightedLimits(unittest.TestCase):
+        ###   Expensive endpoints take more of the default "50 per minute" budget  ###
+    def setUp(self):
+        with mock.patch.object(config.TestingConfig, "RATELIMIT_STORAGE_URI", "batched+memory://"):
+            self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(name="test_user", email="test@email.com", password="test",
+                                address="1st test street", phone="123-4645-3234", salary=50000.0)
+            db.session.add(customer)
+            db.session.flush()
+            db.session.add(Service_tickets(VIN="1HGCM82633A004352", customer_issue="Oil Change",
+                                           service_date=date(2025, 7, 1), customer_id=customer.id))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_app_uses_batched_storage(self):
+        self.assertIsInstance(limiter.storage, BatchedStorage)
+
+    def test_large_pages_cost_more(self):
+        statuses = [self.client.get('/service-tickets/?per_page=100').status_code for _ in range(7)]
+        self.assertEqual(statuses, [200] * 6 + [429])   # 2 x 4 pages = 8 per request out of 50
+
+    def test_detail_costs_one(self):
+        statuses = [self.client.get('/service-tickets/1').status_code for _ in range(51)]
+        self.assertEqual(statuses, [200] * 50 + [429])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+from application import create_app, db
+from application.models import Customer, Service_tickets, Mechanics, Inventory
+from application.blueprints.customers.schemas import customers_schema
+from application.blueprints.inventories.schemas import inventories_schema
+from application.blueprints.mechanics.schemas import mechanics_schema
+from application.blueprints.service_tickets.schemas import service_tickets_schema, service_tickets_export_schema
+from application.utils.row_serializers import RowSerializer
+from application.utils.util import encode_token
+from datetime import date
+from sqlalchemy import event, select
+from sqlalchemy.orm import joinedload, selectinload
+from unittest import mock
+import threading
+import unittest
+
+
+class TestRowSerializers(unittest.TestCase):
+        ###   The compiled row serializers must return exactly what the marshmallow schemas return  ###
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+        db.drop_all()
+        db.create_all()
+        customers = [Customer(name=f"Zoë {i}", email=f"test{i}@email.com", password="test", address=f"{i} test street",
+                              phone="123-456-7890", salary=55000.5 + i) for i in range(3)]
+        mechanics = [Mechanics(name=f"mechanic {i}", email=f"mechanic{i}@email.com", address="garage road",
+                               phone="989-4645-3234") for i in range(4)]
+        db.session.add_all(customers + mechanics)
+        db.session.add_all([Inventory(name="Brake pad set", price=49.99, sku="BP-1"), Inventory(name="Oil filter", price=9.0)])
+        db.session.flush()
+        tickets = [Service_tickets(VIN=f"1HGCM82633A{i:06d}", customer_issue="Oil \"change\"", service_date=date(2025, 7, i + 1),
+                                   customer_id=customers[i % 3].id, mechanics=mechanics[:i % 4]) for i in range(8)]
+        db.session.add_all(tickets)
+        db.session.commit()
+        self.customer_id = customers[1].id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def orm_response(self, schema, query):
+        objects = db.session.execute(query).scalars().all()
+        db.session.expunge_all()
+        return schema.jsonify(objects).get_data()
+
+    def test_customers_list_matches_schema(self):
+        expected = self.orm_response(customers_schema, select(Customer).order_by(Customer.id))
+        self.assertEqual(self.client.get('/customers/').get_data(), expected)
+
+    def test_mechanics_list_matches_schema(self):
+        expected = self.orm_response(mechanics_schema, select(Mechanics))
+        self.assertEqual(self.client.get('/mechanics/').get_data(), expected)
+
+    def test_inventories_list_matches_schema(self):
+        expected = self.orm_response(inventories_schema, select(Inventory))
+        self.assertEqual(self.client.get('/inventories/').get_data(), expected)
+
+    def test_service_tickets_pages_match_schema(self):
+        query = (select(Service_tickets).options(joinedload(Service_tickets.customer), selectinload(Service_tickets.mechanics))
+                 .order_by(Service_tickets.id))
+        expected = self.orm_response(service_tickets_schema, query)
+        self.assertEqual(self.client.get('/service-tickets/?expand=customer,mechanics').get_data(), expected)
+
+        expected = self.orm_response(service_tickets_schema, query.where(Service_tickets.customer_id == self.customer_id))
+        headers = {'Authorization': 'Bearer ' + encode_token(self.customer_id)}
+        self.assertEqual(self.client.get('/service-tickets/my-tickets?expand=mechanics,customer', headers=headers).get_data(), expected)
+
+    def test_pagination_cursor_unchanged(self):
+        response = self.client.get('/service-tickets/?per_page=3')
+        self.assertEqual(len(response.json), 3)
+        next_page = self.client.get(f"/service-tickets/?per_page=3&cursor={response.headers['X-Next-Cursor']}")
+        self.assertEqual(next_page.json[0]['id'], response.json[-1]['id'] + 1)
+
+    def test_no_orm_objects_loaded(self):
+        with self.app.test_request_context():
+            from application.blueprints.service_tickets.schemas import service_tickets_rows
+            service_tickets_rows.all(service_tickets_rows.select())
+            self.assertEqual(len(db.session.identity_map), 0)
+
+    def statements(self, url, headers=None):
+        executed = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get(url, headers=headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        return response, executed
+
+    def test_relationships_are_opt_in(self):
+        response, executed = self.statements('/service-tickets/')
+        self.assertEqual(sorted(response.json[0]), ['VIN', 'customer_id', 'customer_issue', 'id', 'service_date'])
+        self.assertEqual(len(executed), 1)
+        self.assertNotIn('customers', executed[0])
+
+        response, executed = self.statements('/service-tickets/?expand=customer')
+        self.assertIn('salary', response.json[0]['customer'])
+        self.assertEqual(len(executed), 1)   # joined, mechanics never loaded
+
+    def test_sparse_fieldset_narrows_select(self):
+        response, executed = self.statements('/service-tickets/?fields=VIN,service_date')
+        self.assertEqual(response.json[0], {'id': 1, 'VIN': '1HGCM82633A000000', 'service_date': '2025-07-01'})
+        self.assertNotIn('customer_issue', executed[0])
+
+        response = self.client.get('/service-tickets/?fields=VIN,customer.name,mechanics.name&expand=customer,mechanics')
+        self.assertEqual(response.json[1], {'id': 2, 'VIN': '1HGCM82633A000001', 'customer': {'name': 'Zoë 1'},
+                                            'mechanics': [{'name': 'mechanic 0'}]})
+
+    def test_detail_endpoints_accept_fieldsets(self):
+        response = self.client.get(f'/customers/{self.customer_id}?fields=name')
+        self.assertEqual(response.json, {'id': self.customer_id, 'name': 'Zoë 1'})
+        response = self.client.get('/service-tickets/2?fields=VIN&expand=mechanics')
+        self.assertEqual(response.json, {'id': 2, 'VIN': '1HGCM82633A000001', 'mechanics': [
+            {'id': 1, 'name': 'mechanic 0', 'email': 'mechanic0@email.com', 'address': 'garage road', 'phone': '989-4645-3234'}]})
+        self.assertEqual(self.client.get('/mechanics/99?fields=name').status_code, 404)
+
+    def test_invalid_fieldsets_are_rejected(self):
+        for url in ('/customers/?fields=password', '/inventories/1?fields=cost', '/mechanics/?expand=services',
+                    '/service-tickets/?fields=customer.name', '/service-tickets/1?expand=customer&fields=customer.password'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json)
+
+    def test_fieldsets_are_cached_separately(self):
+        narrow = self.client.get('/inventories/?fields=name')
+        full = self.client.get('/inventories/')
+        self.assertEqual(narrow.json[0], {'id': 1, 'name': 'Brake pad set'})
+        self.assertEqual(full.json[0]['sku'], 'BP-1')
+        self.assertNotEqual(narrow.headers['ETag'], full.headers['ETag'])
+
+    def test_fieldset_eviction_is_thread_safe(self):
+        serializer = RowSerializer(inventories_schema)
+        names = ["name", "price", "sku"]
+        variants = [(tuple(sorted({names[i % 3], names[j % 3]})), ()) for i in range(3) for j in range(3)] + [(None, ())]
+        errors = []
+
+        def request_thread(offset):
+            try:
+                for n in range(300):
+                    only, expand = variants[(n + offset) % len(variants)]
+                    serializer.fieldset(only, expand)
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch('application.utils.row_serializers.MAX_FIELDSETS', 2):   # constant eviction
+            threads = [threading.Thread(target=request_thread, args=(offset,)) for offset in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(serializer.fieldsets), 2)
+
+    def test_fields_without_columns_are_rejected(self):
+        with self.assertRaises(TypeError):
+            RowSerializer(service_tickets_export_schema).select()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,10 @@ from application import create_app, db
 from application.models import Customer, Service_tickets, Mechanics, Inventory ,ServiceInventory
 from datetime import date
 from application.utils.util import encode_token
+from sqlalchemy import event, select
+import csv
+import io
+import json
 import unittest 
 
 
@@ -93,6 +97,43 @@ class TestServiceTicket(unittest.TestCase):
         self.assertIsInstance(mechanics, list)
         self.assertEqual(len(mechanics), 2)
 
+        ## Negative Test: one invalid mechanic id rejects the whole ticket ##
+    def test_create_serviceticket_with_invalid_mechanic_is_atomic(self):
+        tickets_before = len(db.session.execute(select(Service_tickets)).scalars().all())
+        payload = dict(self.serviceticket_mechanic_payload, mechanic_ids=[self.mechanic1_id, 555, 777])
+
+        response = self.client.post('/service-tickets/with-mechanics', json=payload)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['message'], "Invalid mechanic id: 555, 777")
+        self.assertEqual(response.json['invalid_mechanic_ids'], [555, 777])
+        db.session.expire_all()
+        self.assertEqual(len(db.session.execute(select(Service_tickets)).scalars().all()), tickets_before)
+
+    def test_create_serviceticket_with_many_mechanics_query_count(self):
+            # mechanic lookups and association inserts are set based, so 20 mechanics cost the same as 2
+        mechanics = [Mechanics(name=f"fleet_{i}", email=f"fleet{i}@email.com", address="fleet street", phone="111-111-1111")
+                     for i in range(20)]
+        db.session.add_all(mechanics)
+        db.session.commit()
+
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            payload = dict(self.serviceticket_mechanic_payload, mechanic_ids=[mechanic.id for mechanic in mechanics])
+            response = self.client.post('/service-tickets/with-mechanics', json=payload)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json['Service']['mechanics']), 20)
+        # one IN lookup for all mechanic ids and one executemany INSERT into mechanic_services
+        self.assertEqual(len([statement for statement in statements if statement.startswith("SELECT mechanics.id FROM mechanics WHERE mechanics.id IN")]), 1)
+        self.assertEqual(len([statement for statement in statements if statement.startswith("INSERT INTO mechanic_services")]), 1)
+
     ##================================= Create ServiceTicket without mechanic Testcase =====================##
 
     def test_create_serviceticket_without_mechanics_success(self):
@@ -176,6 +217,141 @@ class TestServiceTicket(unittest.TestCase):
         self.assertIn('VIN', data[0])
         self.assertIn('customer_issue', data[0])
 
+    def count_queries(self, url, **kwargs):
+            ### Returns the response and the number of SQL statements executed while serving it ###
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = self.client.get(url, **kwargs)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return response, len(statements)
+
+    def test_get_service_tickets_query_count_is_constant(self):
+            # Relationships are loaded in bulk, so the query count must not grow with the number of tickets
+        mechanics = db.session.execute(select(Mechanics)).scalars().all()
+        for service in db.session.execute(select(Service_tickets)).scalars().all():
+            service.mechanics.extend(mechanics)
+        db.session.commit()
+
+        response, few_tickets_queries = self.count_queries('/service-tickets/?per_page=100&expand=customer,mechanics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 3)
+
+        for i in range(30):
+            service = Service_tickets(VIN=f"VIN{i:013d}", customer_issue="Oil Change",
+                                      customer_id=self.customer2_id if i % 2 else self.customer1_id, service_date=date(2025,8,1))
+            service.mechanics.extend(mechanics)
+            db.session.add(service)
+        db.session.commit()
+        db.session.expire_all()
+
+        response, many_tickets_queries = self.count_queries('/service-tickets/?per_page=100&expand=customer,mechanics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 33)
+        self.assertEqual(len(response.json[-1]['mechanics']), 3)
+        self.assertEqual(response.json[-1]['customer']['id'], self.customer2_id)   # last new ticket (i=29) belongs to customer2
+        self.assertEqual(few_tickets_queries, many_tickets_queries)
+
+        headers = {'Authorization': f"Bearer {self.auth_token}"}
+        response, my_tickets_queries = self.count_queries('/service-tickets/my-tickets?per_page=100&expand=customer,mechanics', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 18)   # 3 from setUp + 15 new tickets of customer1
+        self.assertEqual(my_tickets_queries, many_tickets_queries)   # auth runs no SQL
+
+    def test_my_tickets_conditional_get(self):
+        headers = {'Authorization': f"Bearer {self.auth_token}"}
+        response = self.client.get('/service-tickets/my-tickets', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        not_modified, queries = self.count_queries('/service-tickets/my-tickets', headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.headers['ETag'], etag)
+        self.assertEqual(not_modified.data, b"")
+        self.assertEqual(queries, 0)   # neither the tickets query nor the auth touches the db
+
+        other_customer = {'Authorization': f"Bearer {encode_token(self.customer2_id)}", 'If-None-Match': etag}
+        self.assertEqual(self.client.get('/service-tickets/my-tickets', headers=other_customer).status_code, 200)
+
+        response = self.client.put(f'/service-tickets/{self.service1_id}/assign-mechanic/{self.mechanic1_id}')
+        self.assertEqual(response.status_code, 200)
+        changed = self.client.get('/service-tickets/my-tickets', headers={**headers, 'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_get_service_tickets_with_cursor_success(self):
+        first_page = self.client.get('/service-tickets/?per_page=2')
+
+        self.assertEqual(first_page.status_code, 200)
+        self.assertEqual([ticket['id'] for ticket in first_page.json], [self.service1_id, self.service2_id])
+        cursor = first_page.headers.get('X-Next-Cursor')
+        self.assertIsNotNone(cursor)
+
+        second_page = self.client.get(f'/service-tickets/?per_page=2&cursor={cursor}')
+
+        self.assertEqual(second_page.status_code, 200)
+        self.assertEqual([ticket['id'] for ticket in second_page.json], [self.service3_id])
+        self.assertNotIn('X-Next-Cursor', second_page.headers)
+
+    ##=========================== Export all Service tickets Testcase ==============================##
+
+    def add_export_data(self):
+        inventory = Inventory(name="Brake Pad", price=100.0)
+        db.session.add(inventory)
+        db.session.commit()
+        service = db.session.get(Service_tickets, self.service1_id)
+        service.mechanics.extend([db.session.get(Mechanics, self.mechanic1_id), db.session.get(Mechanics, self.mechanic2_id)])
+        db.session.add(ServiceInventory(service_ticket_id=self.service1_id, inventory_id=inventory.id, quantity=4))
+        db.session.commit()
+        return inventory.id
+
+    def test_export_service_tickets_ndjson_success(self):
+        inventory_id = self.add_export_data()
+        self.app.config['EXPORT_CHUNK_SIZE'] = 2   # 3 tickets -> 2 chunks
+
+        response = self.client.get('/service-tickets/export')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.service1_id, self.service2_id, self.service3_id])
+        self.assertEqual(sorted(rows[0]['mechanic_ids']), sorted([self.mechanic1_id, self.mechanic2_id]))
+        self.assertEqual(rows[0]['parts'], [{"inventory_id": inventory_id, "name": "Brake Pad", "price": 100.0, "quantity": 4}])
+        self.assertEqual(rows[0]['service_date'], "2025-07-20")
+        self.assertNotIn('customer', rows[0])   # no nested customer details in the export
+        self.assertEqual(rows[1]['mechanic_ids'], [])
+
+        self.app.config['EXPORT_CHUNK_SIZE'] = 3   # last batch exactly full, the next one is empty
+        response = self.client.get('/service-tickets/export')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.service1_id, self.service2_id, self.service3_id])
+
+    def test_export_service_tickets_csv_success(self):
+        inventory_id = self.add_export_data()
+
+        response = self.client.get('/service-tickets/export?format=csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['VIN'], "TTT2676234634320")
+        self.assertEqual(sorted(rows[0]['mechanic_ids'].split(";")), sorted([str(self.mechanic1_id), str(self.mechanic2_id)]))
+        self.assertEqual(rows[0]['parts'], f"{inventory_id}:4")
+
+        ## Negative Test: unsupported export format ##
+    def test_export_service_tickets_invalid_format(self):
+        response = self.client.get('/service-tickets/export?format=xml')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json['error'], "format must be one of: ndjson, csv.")
+
     ##=========================== Retrieve Specific Service tickets Testcase ==============================##
 
     def test_get_service_ticket_by_id_success(self):
@@ -247,6 +423,38 @@ class TestServiceTicket(unittest.TestCase):
 
         self.assertIn(f"Mechanic id: {invalid_mechanic_id} does not exist.", str(data["Mechanics"]))
 
+    def test_edit_service_ticket_bulk_diff_messages(self):
+        self.client.put(f'/service-tickets/{self.service2_id}/assign-mechanic/{self.mechanic1_id}')
+        payload = {
+            "add_mechanic_ids": [self.mechanic1_id, self.mechanic2_id, self.mechanic3_id, 666],
+            "remove_mechanic_ids": [self.mechanic1_id, self.mechanic3_id, self.mechanic3_id, 777]
+                }
+
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = self.client.put(f'/service-tickets/{self.service2_id}', json=payload)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["Mechanics"], [
+            f"Details is {self.mechanic1_id} already included in this service_tickets.",
+            f"Successfully added item to the mechanic id: {self.mechanic2_id}",
+            f"Successfully added item to the mechanic id: {self.mechanic3_id}",
+            "Mechanic id: 666 does not exist.",
+            f"Succefully removed mechanic id: {self.mechanic1_id}",
+            f"Succefully removed mechanic id: {self.mechanic3_id}",
+            f"Invalid {self.mechanic3_id} is not attached to this service ticket.",
+            "777 does not exist.",
+        ])
+        self.assertEqual([mechanic["id"] for mechanic in response.json["Service"]["mechanics"]], [self.mechanic2_id])
+        self.assertEqual(len([statement for statement in statements if statement.startswith("INSERT INTO mechanic_services")]), 1)
+        self.assertEqual(len([statement for statement in statements if statement.startswith("DELETE FROM mechanic_services")]), 1)
+
     ##==================== Update Specific Service_ticket to assign Mechanic details Testcase ==================##
 
     def test_assign_mechanic_to_service_ticket_success(self):
@@ -359,5 +567,61 @@ class TestServiceTicket(unittest.TestCase):
                                                             inventory_id=inventory1.id).first()
         self.assertEqual(link.quantity, 5)
 
+    def test_add_part_accepts_a_string_inventory_id(self):
+        inventory1 = Inventory(name="Brake Pad", price=100.0)
+        db.session.add(inventory1)
+        db.session.commit()
+
+        response = self.client.post(f"/service-tickets/{self.service2_id}/add_part",
+                                    json={"inventory_id": str(inventory1.id), "quantity": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["inventory_id"], inventory1.id)
+        self.assertEqual(response.json["quantity"], 2)
+
+        response = self.client.post(f"/service-tickets/{self.service2_id}/add_part",
+                                    json={"inventory_id": "brake", "quantity": 2})
+        self.assertEqual(response.status_code, 400)
+
+    ##============ Add many parts(inventory) to a Service_ticket in one request Testcase =================##
+
+    def test_add_parts_to_service_ticket_success(self):
+        inventory1 = Inventory(name="Brake Pad", price=100.0)
+        inventory2 = Inventory(name="Brake Disc", price=250.0)
+        db.session.add_all([inventory1,inventory2])
+        db.session.commit()
+        self.client.post(f"/service-tickets/{self.service2_id}/add_part", json={"inventory_id": inventory1.id, "quantity": 1})
+
+        payload = {"parts": [{"inventory_id": inventory1.id, "quantity": 3},
+                             {"inventory_id": inventory2.id, "quantity": 2},
+                             {"inventory_id": inventory2.id, "quantity": 2}]}
+        response = self.client.post(f"/service-tickets/{self.service2_id}/add_parts", json=payload)
+
+        print("Response add parts", response.json)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["Message"], "Parts added to service ticket successfully.")
+        self.assertEqual(response.json["parts"], [{"inventory_id": inventory1.id, "quantity": 4},
+                                                  {"inventory_id": inventory2.id, "quantity": 4}])
+        links = db.session.execute(select(ServiceInventory).filter_by(service_ticket_id=self.service2_id)).scalars().all()
+        self.assertEqual(len(links), 2)   # one row per part, quantities added up
+
+        ## Negative Test: one invalid inventory id rejects the whole batch ##
+    def test_add_parts_with_invalid_inventory_is_atomic(self):
+        inventory1 = Inventory(name="Brake Pad", price=100.0)
+        db.session.add(inventory1)
+        db.session.commit()
+
+        payload = {"parts": [{"inventory_id": inventory1.id, "quantity": 3}, {"inventory_id": 999, "quantity": 1}]}
+        response = self.client.post(f"/service-tickets/{self.service2_id}/add_parts", json=payload)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["invalid_inventory_ids"], [999])
+        links = db.session.execute(select(ServiceInventory).filter_by(service_ticket_id=self.service2_id)).scalars().all()
+        self.assertEqual(links, [])
+
+        response = self.client.post(f"/service-tickets/{self.service2_id}/add_parts",
+                                    json={"parts": [{"inventory_id": inventory1.id, "quantity": 0}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("parts", response.json)
+
     if __name__ == '__main__':
         unittest.main()
\ No newline at end of file
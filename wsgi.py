@@ -0,0 +1,18 @@
+### Production WSGI entry point ###
+##
+##   gunicorn -c gunicorn.conf.py wsgi:app        (workers/threads from WEB_CONCURRENCY / WEB_THREADS)
+##   waitress-serve --threads 8 --call wsgi:serve  (single process, no fork)
+##
+## Tables are not created here: run `flask --app wsgi create-db` once per deploy.
+
+import os
+from application import create_app
+from application.utils.lifecycle import register_fork_safety, try_warm_up
+
+app = create_app(os.environ.get("APP_CONFIG", "ProductionConfig"))
+register_fork_safety(app)  ## preloaded by gunicorn: children drop the pool inherited from the master
+
+
+def serve(): # waitress --call factory: nothing is forked, warm the pool in this process before serving
+    try_warm_up(app)  ## database down: serve anyway, /ready answers 503 and retries
+    return app